@@ -2,17 +2,26 @@
 Evidence Processor
 處理證據搜尋、過濾、分析和驗證
 """
-from llm_helpers import call_llm, parse_json_response
+from llm_helpers import call_llm, call_llm_stream, parse_json_response, LLM_MAX_CONCURRENCY
+from local_models import predict_nli_labels, similarity_scores
 from qa_tool import web_search
 from temporal_checker import (
-    extract_time_from_claim,
-    extract_time_from_evidence,
-    normalize_time_expression,
-    is_temporally_relevant
+    extract_and_normalize_from_claim,
+    check_batch,
+    temporal_context
 )
-from datetime import datetime
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from urllib.parse import urlparse
 
+logger = logging.getLogger(__name__)
+
 # 官方來源域名列表
 OFFICIAL_DOMAINS = {
     # 政府域名（各國）
@@ -47,6 +56,123 @@ INTERNATIONAL_ORGS = [
     'unesco.org',       # 聯合國教科文組織
 ]
 
+# 搜尋關鍵字需保留的地域詞（claim 中有但 query 中沒有時補上）
+LOCATION_KEYWORDS = [
+    '台北', '臺北', '台中', '臺中', '台南', '臺南', '高雄', '台灣', '臺灣',
+    'Taipei', 'Taichung', 'Tainan', 'Kaohsiung', 'Taiwan',
+]
+
+# claim 中出現即啟用地點衝突檢查的台灣地名（比對前會先將「臺」統一為「台」）
+TAIWAN_LOCATIONS = ['台北', '台中', '台南', '高雄', '台灣', '新北']
+_TW_TRANS = str.maketrans({'臺': '台'})
+
+# 與台灣相關 claim 明顯無關的國外地點
+IRRELEVANT_LOCATIONS = [
+    'San Diego', 'Beijing', '北京', 'Shanghai', '上海',
+    'Hong Kong', '香港', 'Tokyo', '東京', 'Seoul', '首爾',
+    'Singapore', '新加坡', 'London', 'New York', 'Paris',
+]
+
+
+def _compile_alternation(words):
+    """將字詞列表編譯成單一正規表達式，一次掃描即可找出所有字詞"""
+    return re.compile("|".join(map(re.escape, words)))
+
+
+_LOCATION_KEYWORD_RE = _compile_alternation(LOCATION_KEYWORDS)
+_TAIWAN_LOC_RE = _compile_alternation(TAIWAN_LOCATIONS)
+_IRRELEVANT_LOC_RE = _compile_alternation(IRRELEVANT_LOCATIONS)
+
+# 最終判決的回應語言指示
+_LANGUAGE_INSTRUCTIONS = {
+    "zh-TW": "CRITICAL: You MUST respond in Traditional Chinese (繁體中文). All explanations must be in Traditional Chinese.",
+    "en": "CRITICAL: You MUST respond in English. All explanations must be in English.",
+}
+
+_STANCE_SYSTEM = (
+    "Analyze if the evidence supports, refutes, or is irrelevant to the claim.\n"
+    "Return ONLY one word: support / refute / irrelevant\n"
+    "Do not explain, just return the single word."
+)
+
+_VERIFY_SYSTEM_TMPL = (
+    "{language_instruction}\n\n"
+    "You are verifying a factual claim using categorized evidence.\n"
+    "Evidence summary:\n"
+    "- Supporting evidence: {support_count}\n"
+    "- Refuting evidence: {refute_count}\n"
+    "- Irrelevant evidence: {total_irrelevant} (filtered out)\n\n"
+    "Based on the categorized evidence, classify the claim as:\n"
+    "- Supported: If supporting evidence is strong and refuting evidence is weak/absent\n"
+    "- Contradicted: If refuting evidence is strong and supporting evidence is weak/absent\n"
+    "- Insufficient evidence: If evidence is too weak, contradictory, or mostly irrelevant\n\n"
+    "In your explanation, mention:\n"
+    "1. Key supporting/refuting evidence\n"
+    "2. Why you reached this conclusion\n"
+    "3. Any uncertainty or conflicting information\n\n"
+    "{evidence_warning}\n"
+    "IMPORTANT: Your entire response (verdict + explanation) must be in the language specified above.\n"
+    "Return JSON with fields: verdict, explanation."
+)
+
+# 使用本地 NLI 模型取代 LLM 判斷證據立場（需安裝 sentence-transformers）
+USE_LOCAL_STANCE = os.getenv("USE_LOCAL_STANCE", "0") == "1"
+
+NLI_TO_STANCE = {
+    "entailment": "support",
+    "contradiction": "refute",
+    "neutral": "irrelevant",
+}
+
+# 以句向量相似度先排除明顯無關的證據，省下 LLM 呼叫（需安裝 sentence-transformers）
+USE_EMBEDDING_PREFILTER = os.getenv("USE_EMBEDDING_PREFILTER", "0") == "1"
+EMBEDDING_PREFILTER_THRESHOLD = float(os.getenv("EMBEDDING_PREFILTER_THRESHOLD", "0.2"))
+
+# 將立場標註與最終判決合併為單次 LLM 呼叫（失敗時退回逐一分析）
+FUSED_VERIFICATION = os.getenv("FUSED_VERIFICATION", "0") == "1"
+
+_FUSED_SYSTEM_TMPL = (
+    "{language_instruction}\n\n"
+    "You are verifying a factual claim against {evidence_count} numbered evidences.\n"
+    "Step 1: Label EACH evidence as support, refute, or irrelevant to the claim.\n"
+    "Step 2: Based on the labeled evidence, classify the claim as:\n"
+    "- Supported: If supporting evidence is strong and refuting evidence is weak/absent\n"
+    "- Contradicted: If refuting evidence is strong and supporting evidence is weak/absent\n"
+    "- Insufficient evidence: If evidence is too weak, contradictory, or mostly irrelevant\n\n"
+    "In your explanation, mention:\n"
+    "1. Key supporting/refuting evidence\n"
+    "2. Why you reached this conclusion\n"
+    "3. Any uncertainty or conflicting information\n\n"
+    "{evidence_warning}\n"
+    "IMPORTANT: Your explanation must be in the language specified above.\n"
+    "Return JSON with fields: evidence_labels (array of exactly {evidence_count} labels, in evidence order), verdict, explanation."
+)
+
+# 批次判決：多個 claim 的最終判決合併為一次 LLM 呼叫，單次最多 VERDICT_BATCH_SIZE 個
+BATCHED_VERIFICATION = os.getenv("BATCHED_VERIFICATION", "0") == "1"
+VERDICT_BATCH_SIZE = 4
+
+_BATCH_VERIFY_SYSTEM_TMPL = (
+    "{language_instruction}\n\n"
+    "You are verifying {claim_count} factual claims. Each claim is listed under '### Claim N' "
+    "with its own evidence summary and categorized evidence. Judge each claim ONLY by its own evidence.\n\n"
+    "Classify each claim as:\n"
+    "- Supported: If supporting evidence is strong and refuting evidence is weak/absent\n"
+    "- Contradicted: If refuting evidence is strong and supporting evidence is weak/absent\n"
+    "- Insufficient evidence: If evidence is too weak, contradictory, or mostly irrelevant\n\n"
+    "In each explanation, mention:\n"
+    "1. Key supporting/refuting evidence\n"
+    "2. Why you reached this conclusion\n"
+    "3. Any uncertainty or conflicting information\n\n"
+    "IMPORTANT: Every explanation must be in the language specified above.\n"
+    "Return ONLY JSON in exactly this schema, with one entry per claim:\n"
+    '{{"results": [{{"idx": <claim number>, "verdict": "Supported" | "Contradicted" | "Insufficient evidence", '
+    '"explanation": "<string>"}}]}}'
+)
+
+# 單次批次立場分析最多包含的證據數（避免超出 context window）
+STANCE_BATCH_SIZE = 8
+
 
 def get_source_credibility_tier(url):
     """
@@ -82,6 +208,42 @@ def get_source_credibility_tier(url):
         return "standard"
 
 
+_SEARCH_QUERY_SYSTEM = (
+    "Extract the most important keywords for fact-checking this claim.\n"
+    "CRITICAL: Keep the query in the SAME LANGUAGE as the claim.\n"
+    "- If claim is in Chinese → return Chinese keywords\n"
+    "- If claim is in English → return English keywords\n\n"
+    "Return ONLY 2-4 key terms that would help find relevant evidence.\n"
+    "Focus on:\n"
+    "- Names of people, organizations, places\n"
+    "- Specific events or policies\n"
+    "- Dates or time periods\n"
+    "- Core factual assertions\n\n"
+    "CRITICAL for location keywords:\n"
+    "- Keep COMPLETE place names with country/region prefix (e.g., '日本東北' not just '東北', 'Taiwan Taipei' not just 'Taipei')\n"
+    "- NEVER drop the country/region name before a location\n"
+    "- Examples: '日本岩手縣' ✓, '岩手縣' ✗ | 'Japan Iwate' ✓, 'Iwate' ✗\n\n"
+    "Remove: opinions, adjectives, unnecessary words.\n"
+    "Return as a simple search query string (not JSON)."
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _extract_search_keywords(claim):
+    """
+    以 LLM 提取 claim 的搜尋關鍵字（依 claim 快取；失敗時拋出例外，不會被快取）
+    
+    Args:
+        claim: 待驗證的主張
+    
+    Returns:
+        清理後的關鍵字字串
+    """
+    query = call_llm(_SEARCH_QUERY_SYSTEM, f"Claim: {claim}")
+    # 清理回應，移除引號和多餘空白
+    return query.strip().strip('"').strip("'")
+
+
 def generate_search_query(claim, search_mode='general'):
     """
     從claim中提取最佳搜尋關鍵字
@@ -93,34 +255,13 @@ def generate_search_query(claim, search_mode='general'):
     Returns:
         優化後的搜尋查詢字串
     """
-    system = (
-        "Extract the most important keywords for fact-checking this claim.\n"
-        "CRITICAL: Keep the query in the SAME LANGUAGE as the claim.\n"
-        "- If claim is in Chinese → return Chinese keywords\n"
-        "- If claim is in English → return English keywords\n\n"
-        "Return ONLY 2-4 key terms that would help find relevant evidence.\n"
-        "Focus on:\n"
-        "- Names of people, organizations, places\n"
-        "- Specific events or policies\n"
-        "- Dates or time periods\n"
-        "- Core factual assertions\n\n"
-        "CRITICAL for location keywords:\n"
-        "- Keep COMPLETE place names with country/region prefix (e.g., '日本東北' not just '東北', 'Taiwan Taipei' not just 'Taipei')\n"
-        "- NEVER drop the country/region name before a location\n"
-        "- Examples: '日本岩手縣' ✓, '岩手縣' ✗ | 'Japan Iwate' ✓, 'Iwate' ✗\n\n"
-        "Remove: opinions, adjectives, unnecessary words.\n"
-        "Return as a simple search query string (not JSON)."
-    )
-    
     try:
-        query = call_llm(system, f"Claim: {claim}")
-        # 清理回應，移除引號和多餘空白
-        query = query.strip().strip('"').strip("'")
+        query = _extract_search_keywords(claim)
         
         # 強制加入地域關鍵字（如果claim中有但query中沒有）
-        location_keywords = ['台北', '臺北', '台中', '臺中', '台南', '臺南', '高雄', '台灣', '臺灣', 'Taipei', 'Taichung', 'Tainan', 'Kaohsiung', 'Taiwan']
-        for loc in location_keywords:
-            if loc in claim and loc not in query:
+        for match in _LOCATION_KEYWORD_RE.finditer(claim):
+            loc = match.group()
+            if loc not in query:
                 query = f"{loc} {query}"
                 break
         
@@ -152,28 +293,72 @@ def is_evidence_potentially_relevant(claim, evidence_title, evidence_body):
     Returns:
         True 保留，False 過濾掉
     """
-    evidence_text = (evidence_title + " " + evidence_body)
-    
-    # 檢測claim中的台灣相關地點
-    taiwan_locations = ['台北', '臺北', '台中', '臺中', '台南', '臺南', '高雄', '台灣', '臺灣', '新北']
-    has_taiwan_location = any(loc in claim for loc in taiwan_locations)
-    
-    # 如果claim提到台灣地點，但證據提到明顯不相關的國外地點，則過濾
-    if has_taiwan_location:
-        irrelevant_locations = [
-            'San Diego', 'Beijing', '北京', 'Shanghai', '上海', 
-            'Hong Kong', '香港', 'Tokyo', '東京', 'Seoul', '首爾',
-            'Singapore', '新加坡', 'London', 'New York', 'Paris'
-        ]
-        # 檢查是否有明顯衝突的地點（同時出現在證據中但不在claim中）
-        for irrelevant_loc in irrelevant_locations:
-            if irrelevant_loc in evidence_text and irrelevant_loc not in claim:
+    # 檢測claim中的台灣相關地點；沒有則不做地點檢查，保留證據給LLM分析（寬鬆策略）
+    if not _TAIWAN_LOC_RE.search(claim.translate(_TW_TRANS)):
+        return True
+    
+    # claim提到台灣地點，但證據提到明顯不相關的國外地點（不在claim中），則過濾
+    for text in (evidence_title, evidence_body):
+        for match in _IRRELEVANT_LOC_RE.finditer(text):
+            if match.group() not in claim:
                 return False
     
-    # 預設：保留證據給LLM分析（寬鬆策略）
     return True
 
 
+def dedupe_search_results(results):
+    """
+    依標題前 80 字與內容前 200 字去除重複的搜尋結果（保留第一筆）
+    
+    Args:
+        results: 預過濾後的搜尋結果列表（包含 _title, _body）
+    
+    Returns:
+        (unique_results, removed_count)
+    """
+    seen = set()
+    unique = []
+    for r in results:
+        key_text = (r['_title'][:80] + "\n" + r['_body'][:200]).lower()
+        key_text = " ".join(key_text.split())
+        digest = hashlib.blake2b(key_text.encode('utf-8'), digest_size=8).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        unique.append(r)
+    return unique, len(results) - len(unique)
+
+
+def mark_low_similarity_evidence(claim, evidences, threshold=EMBEDDING_PREFILTER_THRESHOLD):
+    """
+    以句向量相似度標記與 claim 明顯無關的證據（r['_low_similarity'] = True）
+    被標記的證據不再送交 LLM，直接歸類為 irrelevant
+    
+    Args:
+        claim: 待驗證的主張
+        evidences: 預過濾後的搜尋結果列表（包含 _title, _body）
+        threshold: cosine 相似度門檻
+    
+    Returns:
+        被標記的證據數量（模型無法使用時為 0）
+    """
+    texts = [f"{r['_title']} {r['_body']}" for r in evidences]
+    try:
+        scores = similarity_scores(claim, texts)
+    except Exception as e:
+        logger.warning("Embedding pre-filter failed (%s), skipping", e)
+        return 0
+    if scores is None:
+        return 0
+    
+    marked = 0
+    for r, score in zip(evidences, scores):
+        if score < threshold:
+            r['_low_similarity'] = True
+            marked += 1
+    return marked
+
+
 def analyze_evidence_stance(claim, evidence_title, evidence_body):
     """
     判斷單個證據與claim的關係：支持/反駁/無關
@@ -186,49 +371,205 @@ def analyze_evidence_stance(claim, evidence_title, evidence_body):
     Returns:
         "support" | "refute" | "irrelevant"
     """
-    system = (
-        "Analyze if the evidence supports, refutes, or is irrelevant to the claim.\n"
-        "Return ONLY one word: support / refute / irrelevant\n"
-        "Do not explain, just return the single word."
-    )
-    
     user = f"Claim: {claim}\n\nEvidence:\nTitle: {evidence_title}\nContent: {evidence_body}"
     
     try:
-        result = call_llm(system, user).strip().lower()
-        # 標準化回應
-        if "support" in result:
-            return "support"
-        elif "refute" in result or "contradict" in result:
-            return "refute"
-        else:
-            return "irrelevant"
+        return _normalize_stance(call_llm(_STANCE_SYSTEM, user))
     except Exception:
         return "irrelevant"
 
 
-def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_date=None):
+def _normalize_stance(label):
+    """將 LLM 回傳的立場文字標準化為 support / refute / irrelevant"""
+    label = str(label).strip().lower()
+    if "support" in label:
+        return "support"
+    elif "refute" in label or "contradict" in label:
+        return "refute"
+    else:
+        return "irrelevant"
+
+
+def analyze_evidence_stances(claim, evidences):
     """
-    驗證單個主張
+    並行判斷多個證據的立場（每個證據各一次 LLM 呼叫）
     
     Args:
         claim: 待驗證的主張
-        language: 回應語言
-        temporal_check: 是否進行時間相關性檢查（預設開啟）
-        claim_reference_date: claim 的發布日期（用於時間檢查），None 則使用今天
+        evidences: 預過濾後的搜尋結果列表（包含 _title, _body）
     
     Returns:
-        {
-            "verdict": "Supported" | "Contradicted" | "Insufficient evidence" | "Temporal mismatch",
-            "explanation": str,
-            "evidence_count": int,
-            "search_query": str,
-            "evidence_breakdown": {"support": int, "refute": int, "irrelevant": int},
-            "temporal_warning": str (optional),
-            "source_type": "official" | "general" (optional),
-            "authoritative_override": bool (optional)
-        }
+        與 evidences 順序對應的 stance 列表
+    """
+    if not evidences:
+        return []
+    
+    def stance_of(r):
+        return analyze_evidence_stance(claim, r['_title'], r['_body'])
+    
+    workers = min(LLM_MAX_CONCURRENCY, len(evidences))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(stance_of, evidences))
+
+
+def _chunked(items, size):
+    """將列表切成最多 size 個元素的區塊"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _analyze_stance_chunk(claim, evidences):
+    """
+    以單次 LLM 呼叫判斷一批證據的立場，解析失敗時退回逐一分析
+    
+    Args:
+        claim: 待驗證的主張
+        evidences: 預過濾後的搜尋結果列表（包含 _title, _body；不超過 STANCE_BATCH_SIZE）
+    
+    Returns:
+        與 evidences 順序對應的 stance 列表
+    """
+    system = (
+        "For each numbered evidence, decide if it supports, refutes, or is irrelevant to the claim.\n"
+        f"Return ONLY a JSON array of exactly {len(evidences)} labels, one per evidence, in order.\n"
+        'Each label must be one word: "support", "refute" or "irrelevant".\n'
+        'Example for 3 evidences: ["support", "irrelevant", "refute"]'
+    )
+    
+    evidence_lines = []
+    for i, r in enumerate(evidences, 1):
+        evidence_lines.append(f"[{i}] Title: {r['_title']}\nContent: {r['_body']}")
+    user = f"Claim: {claim}\n\nEvidences:\n" + "\n\n".join(evidence_lines)
+    
+    try:
+        labels = parse_json_response(call_llm(system, user))
+        if isinstance(labels, list) and len(labels) == len(evidences):
+            return [_normalize_stance(label) for label in labels]
+        logger.warning("Batch stance result malformed, falling back to per-evidence analysis")
+    except Exception as e:
+        logger.warning("Batch stance analysis failed (%s), falling back to per-evidence analysis", e)
+    
+    return analyze_evidence_stances(claim, evidences)
+
+
+def analyze_evidence_stances_batch(claim, evidences):
+    """
+    批次判斷多個證據的立場：每 STANCE_BATCH_SIZE 個證據合併為一次 LLM 呼叫
+    
+    Args:
+        claim: 待驗證的主張
+        evidences: 預過濾後的搜尋結果列表（包含 _title, _body）
+    
+    Returns:
+        與 evidences 順序對應的 stance 列表
+    """
+    chunks = list(_chunked(evidences, STANCE_BATCH_SIZE))
+    if not chunks:
+        return []
+    if len(chunks) == 1:
+        return _analyze_stance_chunk(claim, chunks[0])
+    
+    with ThreadPoolExecutor(max_workers=min(LLM_MAX_CONCURRENCY, len(chunks))) as executor:
+        results = executor.map(lambda chunk: _analyze_stance_chunk(claim, chunk), chunks)
+        return [stance for chunk_stances in results for stance in chunk_stances]
+
+
+# 官方來源立場對應的判決與說明前綴
+OFFICIAL_VERDICTS = {
+    "support": ("Supported", "🏛️ 官方來源證實"),
+    "refute": ("Contradicted", "🏛️ 官方來源反駁"),
+}
+
+
+def analyze_evidence_stances_nli(claim, evidences):
+    """
+    以本地 NLI cross-encoder 批次判斷證據立場（證據為前提，claim 為假設）
+    
+    Args:
+        claim: 待驗證的主張
+        evidences: 預過濾後的搜尋結果列表（包含 _title, _body）
+    
+    Returns:
+        與 evidences 順序對應的 stance 列表，模型無法使用時返回 None
+    """
+    pairs = [(f"{r['_title']} {r['_body']}", claim) for r in evidences]
+    try:
+        labels = predict_nli_labels(pairs)
+    except Exception as e:
+        logger.warning("Local stance model failed (%s), using LLM", e)
+        return None
+    if labels is None:
+        return None
+    return [NLI_TO_STANCE.get(label, "irrelevant") for label in labels]
+
+
+def _official_override_result(stance, verified_official, official_query):
+    """
+    以第一個官方來源的立場直接產生驗證結果
+    
+    Args:
+        stance: 第一個官方來源的立場（support / refute）
+        verified_official: 已確認的官方來源搜尋結果
+        official_query: 官方來源搜尋關鍵字
+    
+    Returns:
+        verify_claim 格式的結果（authoritative_override=True）
+    """
+    verdict, label = OFFICIAL_VERDICTS[stance]
+    first_official = verified_official[0]
+    official_url = first_official.get('href', 'N/A')
+    breakdown = {"support": 0, "refute": 0, "irrelevant": 0}
+    breakdown[stance] = len(verified_official)
+    breakdown["official_sources"] = verified_official
+    
+    return {
+        "verdict": verdict,
+        "explanation": f"{label}：{official_url}\n\n{first_official.get('body', '')[:300]}...",
+        "evidence_count": len(verified_official),
+        "search_query": official_query,
+        "source_type": "official",
+        "authoritative_override": True,
+        "evidence_breakdown": breakdown
+    }
+
+
+def _extract_claim_time(claim, claim_reference_date=None):
+    """
+    提取並標準化 claim 中的時間描述
+    
+    Args:
+        claim: 待驗證的主張
+        claim_reference_date: claim 的發布日期，None 則使用今天
+    
+    Returns:
+        (time_expression, time_info)，沒有時間描述時為 (None, None)
+    """
+    # 使用 claim 的發布日期作為參考點（提取與標準化在同一次 LLM 呼叫完成）
+    time_info = extract_and_normalize_from_claim(claim, claim_reference_date)
+    if time_info is None:
+        return None, None
+    return time_info['original_expression'], time_info
+
+
+def _prepare_verification(claim, language="zh-TW", temporal_check=True, claim_reference_date=None):
     """
+    verify_claim 的前置階段：搜尋、過濾並分類證據，組出最終判決的提示詞
+    
+    Args:
+        同 verify_claim
+    
+    Returns:
+        (result, prepared)
+        - result: 可直接返回的驗證結果（官方來源採信、搜尋失敗等），否則為 None
+        - prepared: 最終判決所需的資料（system, user, 證據統計），result 不為 None 時為 None
+    """
+    # 本次驗證共用的「今天」（可用 FAKE_NEWS_REF_DATE 固定）
+    now_iso = temporal_context().today.isoformat()
+    
     # 初始化預設值，避免變數未定義
     search_query = claim
     valid_results = []
@@ -238,26 +579,35 @@ def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_d
     claim_time_info = None
     temporal_warnings = []
     
-    if temporal_check:
+    # 時間提取與官方搜尋關鍵字生成互不相依，同時進行
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        official_query_future = executor.submit(generate_search_query, claim, 'official')
+        claim_time_future = None
+        if temporal_check:
+            claim_time_future = executor.submit(_extract_claim_time, claim, claim_reference_date or now_iso)
+        
+        if claim_time_future is not None:
+            try:
+                claim_time_expression, claim_time_info = claim_time_future.result()
+                if claim_time_expression:
+                    logger.info("-> 發現時間描述: %s", claim_time_expression)
+                    logger.info("-> 標準化時間: %s (%s)", claim_time_info.get('parsed_date'), claim_time_info.get('time_type'))
+            except Exception as e:
+                logger.warning("Time extraction failed (%s)", e)
+        
         try:
-            claim_time_expression = extract_time_from_claim(claim)
-            if claim_time_expression:
-                print(f"  -> 發現時間描述: {claim_time_expression}")
-                # 使用 claim 的發布日期作為參考點
-                ref_date = claim_reference_date or datetime.now().isoformat()
-                claim_time_info = normalize_time_expression(claim_time_expression, ref_date)
-                print(f"  -> 標準化時間: {claim_time_info.get('parsed_date')} ({claim_time_info.get('time_type')})")
+            official_query = official_query_future.result()
         except Exception as e:
-            print(f"  Warning: Time extraction failed ({e})")
+            logger.warning("Search query generation failed (%s), using original claim", e)
+            official_query = claim
 
     # === 第一階段：搜尋官方來源 ===
-    print(f"\n  [階段1] 搜尋官方來源...")
-    official_query = generate_search_query(claim, search_mode='official')
-    print(f"  -> 官方搜尋關鍵字: {official_query}")
+    logger.info("[階段1] 搜尋官方來源...")
+    logger.info("-> 官方搜尋關鍵字: %s", official_query)
     
     try:
         official_results = web_search(official_query, max_results=5)
-        print(f"  -> 找到 {len(official_results)} 個搜尋結果")
+        logger.info("-> 找到 %s 個搜尋結果", len(official_results))
         
         # 過濾出真正的官方來源
         verified_official = []
@@ -266,7 +616,7 @@ def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_d
                 verified_official.append(result)
         
         if verified_official:
-            print(f"  [官方來源] 找到 {len(verified_official)} 個官方來源，直接採信")
+            logger.info("[官方來源] 找到 %s 個官方來源，直接採信", len(verified_official))
             
             # 分析第一個官方來源的立場
             first_official = verified_official[0]
@@ -276,55 +626,24 @@ def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_d
                 first_official.get('body', '')
             )
             
-            official_url = first_official.get('href', 'N/A')
-            
-            if stance == 'support':
-                return {
-                    "verdict": "Supported",
-                    "explanation": f"🏛️ 官方來源證實：{official_url}\n\n{first_official.get('body', '')[:300]}...",
-                    "evidence_count": len(verified_official),
-                    "search_query": official_query,
-                    "source_type": "official",
-                    "authoritative_override": True,
-                    "evidence_breakdown": {
-                        "support": len(verified_official),
-                        "refute": 0,
-                        "irrelevant": 0,
-                        "official_sources": verified_official
-                    }
-                }
-            elif stance == 'refute':
-                return {
-                    "verdict": "Contradicted",
-                    "explanation": f"🏛️ 官方來源反駁：{official_url}\n\n{first_official.get('body', '')[:300]}...",
-                    "evidence_count": len(verified_official),
-                    "search_query": official_query,
-                    "source_type": "official",
-                    "authoritative_override": True,
-                    "evidence_breakdown": {
-                        "support": 0,
-                        "refute": len(verified_official),
-                        "irrelevant": 0,
-                        "official_sources": verified_official
-                    }
-                }
-            else:
-                print(f"  [官方來源] 官方來源不相關，繼續一般搜尋")
+            if stance in OFFICIAL_VERDICTS:
+                return _official_override_result(stance, verified_official, official_query), None
+            logger.info("[官方來源] 官方來源不相關，繼續一般搜尋")
         else:
-            print(f"  [官方來源] 未找到可信官方來源")
+            logger.info("[官方來源] 未找到可信官方來源")
     except Exception as e:
-        print(f"  [官方來源] 搜尋失敗: {e}")
+        logger.warning("[官方來源] 搜尋失敗: %s", e)
     
     # === 第二階段：一般搜尋 ===
-    print(f"\n  [階段2] 進行一般搜尋...")
+    logger.info("[階段2] 進行一般搜尋...")
     valid_results = []
     
     try:
         # 先生成更精準的搜尋查詢
         search_query = generate_search_query(claim, search_mode='general')
-        print(f"  -> 搜尋關鍵字: {search_query}")
+        logger.info("-> 搜尋關鍵字: %s", search_query)
     except Exception as e:
-        print(f"  Warning: Search query generation failed ({e}), using original claim")
+        logger.warning("Search query generation failed (%s), using original claim", e)
         search_query = claim
     
     try:
@@ -334,13 +653,13 @@ def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_d
         # 過濾有效結果
         valid_results = [r for r in search_results if r.get('title') and r.get('body')]
     except Exception as e:
-        print(f"  Error: Search failed ({e})")
+        logger.warning("Search failed (%s)", e)
         return {
             "verdict": "Insufficient evidence",
             "explanation": f"Search error: {str(e)}",
             "evidence_count": 0,
             "search_query": search_query
-        }
+        }, None
     
     # 即使少於3個也繼續分析，但會在結果中註明
     evidence_warning = ""
@@ -353,73 +672,68 @@ def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_d
             "explanation": "No relevant evidence found. Cannot verify this claim.",
             "evidence_count": 0,
             "search_query": search_query,
-            "evidence_breakdown": {"support": 0, "refute": 0, "irrelevant": 0}
-        }
+            "evidence_breakdown": {"support": 0, "refute": 0, "irrelevant": 0, "duplicate": 0}
+        }, None
 
     # 分析每個證據的立場
-    print(f"  → Analyzing stance of {len(valid_results)} evidence sources...")
+    logger.info("→ Analyzing stance of %s evidence sources...", len(valid_results))
     
     # 先預過濾明顯不相關的結果
     filtered_results = []
     filtered_out = 0
     for r in valid_results:
-        if is_evidence_potentially_relevant(claim, r.get('title', ''), r.get('body', '')):
+        title = r.get('title', '')
+        body = r.get('body', '')
+        if is_evidence_potentially_relevant(claim, title, body):
+            # 只取值一次，後續去重、立場分析與分類直接讀取 _title/_body
+            r['_title'] = title
+            r['_body'] = body
+            r['_snippet'] = body[:200] + ("..." if len(body) > 200 else "")
             filtered_results.append(r)
         else:
             filtered_out += 1
     
     if filtered_out > 0:
-        print(f"     Pre-filtered {filtered_out} obviously irrelevant sources")
+        logger.info("Pre-filtered %s obviously irrelevant sources", filtered_out)
+    
+    # 移除鏡像網站造成的重複結果，避免同一內容重複分析
+    filtered_results, duplicates = dedupe_search_results(filtered_results)
+    if duplicates > 0:
+        logger.info("Removed %s duplicate sources", duplicates)
+    
+    if USE_EMBEDDING_PREFILTER:
+        low_similarity = mark_low_similarity_evidence(claim, filtered_results)
+        if low_similarity > 0:
+            logger.info("%s sources below similarity threshold, marked irrelevant", low_similarity)
     
     # 時間相關性過濾（如果啟用）
     if temporal_check and claim_time_info and claim_time_info.get('time_type') != 'no_time_reference':
-        temporally_filtered = []
-        temporal_filtered_out = 0
-        
+        # 已判定無關的證據不需要時間分析
+        to_check = []
         for r in filtered_results:
-            # 從證據中提取時間表達式和發布日期
-            evidence_time_data = extract_time_from_evidence(r.get('body', ''))
-            evidence_time_expr = evidence_time_data.get('time_expression')
-            evidence_pub_date = evidence_time_data.get('publish_date')
-            
-            if evidence_time_expr:
-                # 決定參考點：優先使用證據的發布日期，否則使用今天
-                if evidence_pub_date:
-                    try:
-                        # 嘗試標準化證據發布日期
-                        normalized_pub_date = normalize_time_expression(evidence_pub_date, datetime.now().isoformat())
-                        reference_date = normalized_pub_date.get('parsed_date', datetime.now().isoformat())
-                        print(f"     使用證據發布日期作為參考: {reference_date}")
-                    except:
-                        reference_date = datetime.now().isoformat()
-                        print(f"     證據發布日期標準化失敗，使用今天作為參考")
-                else:
-                    reference_date = datetime.now().isoformat()
-                
-                # 標準化證據時間（使用證據發布日期或今天作為參考點）
-                evidence_time_info = normalize_time_expression(evidence_time_expr, reference_date)
-                
-                # 檢查時間相關性（僅標記，不過濾）
-                temporal_result = is_temporally_relevant(claim_time_info, evidence_time_info)
-                
-                r['temporal_status'] = temporal_result['status']
-                r['temporal_info'] = temporal_result
-                
-                # 保留所有證據，只標記時間狀態
-                temporally_filtered.append(r)
-                
-                if not temporal_result['is_relevant']:
-                    temporal_warnings.append(
-                        f"⚠️ 證據 '{r.get('title', '')[:50]}...' 的時間 ({temporal_result['evidence_date']}) "
-                        f"不符合 claim 的時間範圍 ({temporal_result['expected_range']})，但仍保留供分析"
-                    )
+            if r.get('_low_similarity'):
+                r['temporal_status'] = 'no_constraint'
             else:
+                to_check.append(r)
+        
+        # 所有證據的時間提取與標準化並行進行（發布日期優先作為參考點，否則使用今天）
+        temporal_results = check_batch(claim_time_info, [r['_body'] for r in to_check], now_iso)
+        
+        for r, temporal_result in zip(to_check, temporal_results):
+            if temporal_result is None:
                 # 無法提取時間的證據保留
                 r['temporal_status'] = 'no_constraint'
-                temporally_filtered.append(r)
-        
-        # 移除 temporal_filtered_out 相關邏輯（不再過濾證據）
-        filtered_results = temporally_filtered
+                continue
+            
+            # 檢查時間相關性（僅標記，不過濾）
+            r['temporal_status'] = temporal_result['status']
+            r['temporal_info'] = temporal_result
+            
+            if not temporal_result['is_relevant']:
+                temporal_warnings.append(
+                    f"⚠️ 證據 '{r['_title'][:50]}...' 的時間 ({temporal_result['evidence_date']}) "
+                    f"不符合 claim 的時間範圍 ({temporal_result['expected_range']})，但仍保留供分析"
+                )
     
     # === Step 5: 分析每個證據 ===    # 如果過濾後沒有結果，返回證據不足
     if len(filtered_results) == 0:
@@ -428,23 +742,65 @@ def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_d
             "explanation": f"All {len(valid_results)} search results were irrelevant to the claim (wrong location/topic).",
             "evidence_count": len(valid_results),
             "search_query": search_query,
-            "evidence_breakdown": {"support": 0, "refute": 0, "irrelevant": len(valid_results)}
-        }
+            "evidence_breakdown": {
+                "support": 0, "refute": 0, "irrelevant": len(valid_results), "duplicate": duplicates
+            }
+        }, None
     
+    classify = functools.partial(
+        _classify_and_build_prompt, claim, language, filtered_results, filtered_out, duplicates,
+        len(valid_results), search_query, evidence_warning, temporal_warnings
+    )
+    if FUSED_VERIFICATION:
+        prepared = _build_fused_prompt(
+            claim, language, filtered_results, filtered_out, duplicates,
+            len(valid_results), search_query, evidence_warning, temporal_warnings
+        )
+        prepared["fallback"] = classify
+        return None, prepared
+    
+    return None, classify()
+
+
+def _classify_and_build_prompt(claim, language, filtered_results, filtered_out, duplicates, evidence_count,
+                               search_query, evidence_warning, temporal_warnings):
+    """
+    逐一判斷證據立場，並組出最終判決的提示詞
+    
+    Args:
+        claim: 待驗證的主張
+        language: 回應語言
+        filtered_results: 通過預過濾的搜尋結果
+        filtered_out: 被預過濾掉的數量
+        duplicates: 去重時移除的重複來源數量
+        evidence_count: 有效搜尋結果總數
+        search_query: 一般搜尋關鍵字
+        evidence_warning: 證據不足警告
+        temporal_warnings: 時間警告列表
+    
+    Returns:
+        最終判決所需的資料（system, user, 證據統計）
+    """
     categorized_evidence = {
         "support": [],
         "refute": [],
         "irrelevant": []
     }
     
+    append_by_stance = {stance: items.append for stance, items in categorized_evidence.items()}
+    to_classify = [r for r in filtered_results if not r.get('_low_similarity')]
+    stances = None
+    if USE_LOCAL_STANCE:
+        stances = analyze_evidence_stances_nli(claim, to_classify)
+    if stances is None:
+        stances = analyze_evidence_stances_batch(claim, to_classify)
+    stance_iter = iter(stances)
+    
     for r in filtered_results:
-        title = r.get('title', '')
-        body = r.get('body', '')
-        stance = analyze_evidence_stance(claim, title, body)
-        
+        stance = "irrelevant" if r.get('_low_similarity') else next(stance_iter)
         evidence_item = {
-            "title": title,
-            "snippet": body[:200] + "..." if len(body) > 200 else body,
+            "title": r['_title'],
+            "snippet": r['_snippet'],
             "href": r.get('href', '')
         }
         
@@ -452,7 +808,7 @@ def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_d
         if 'temporal_info' in r:
             evidence_item['temporal_info'] = r['temporal_info']
         
-        categorized_evidence[stance].append(evidence_item)
+        append_by_stance[stance](evidence_item)
     
     support_count = len(categorized_evidence["support"])
     refute_count = len(categorized_evidence["refute"])
@@ -461,83 +817,377 @@ def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_d
     # 加上被預過濾掉的數量
     total_irrelevant = irrelevant_count + filtered_out
     
-    print(f"     Support: {support_count}, Refute: {refute_count}, Irrelevant: {total_irrelevant} (pre-filtered: {filtered_out})")
+    logger.info("Support: %s, Refute: %s, Irrelevant: %s (pre-filtered: %s)", support_count, refute_count, total_irrelevant, filtered_out)
     
     # 建立分類後的證據摘要給LLM
-    context = ""
+    ctx_parts = []
     
     if categorized_evidence["support"]:
-        context += "=== Supporting Evidence ===\n"
+        ctx_parts.append("=== Supporting Evidence ===\n")
         for i, ev in enumerate(categorized_evidence["support"], 1):
-            context += f"{i}. [{ev['title']}]\n   {ev['snippet']}\n\n"
+            ctx_parts.append(f"{i}. [{ev['title']}]\n   {ev['snippet']}\n\n")
     
     if categorized_evidence["refute"]:
-        context += "=== Refuting Evidence ===\n"
+        ctx_parts.append("=== Refuting Evidence ===\n")
         for i, ev in enumerate(categorized_evidence["refute"], 1):
-            context += f"{i}. [{ev['title']}]\n   {ev['snippet']}\n\n"
+            ctx_parts.append(f"{i}. [{ev['title']}]\n   {ev['snippet']}\n\n")
     
     if categorized_evidence["irrelevant"]:
-        context += f"=== Irrelevant Evidence ({total_irrelevant} sources total, {filtered_out} pre-filtered) ===\n(Not shown for brevity)\n\n"
+        ctx_parts.append(f"=== Irrelevant Evidence ({total_irrelevant} sources total, {filtered_out} pre-filtered) ===\n(Not shown for brevity)\n\n")
+    
+    context = "".join(ctx_parts)
 
     # 根據語言設定回應語言
-    language_instruction = ""
-    if language == "zh-TW":
-        language_instruction = "CRITICAL: You MUST respond in Traditional Chinese (繁體中文). All explanations must be in Traditional Chinese."
-    elif language == "en":
-        language_instruction = "CRITICAL: You MUST respond in English. All explanations must be in English."
-    else:
-        language_instruction = "CRITICAL: You MUST respond in Traditional Chinese (繁體中文). All explanations must be in Traditional Chinese."
-
-    system = (
-        f"{language_instruction}\n\n"
-        "You are verifying a factual claim using categorized evidence.\n"
-        f"Evidence summary:\n"
-        f"- Supporting evidence: {support_count}\n"
-        f"- Refuting evidence: {refute_count}\n"
-        f"- Irrelevant evidence: {total_irrelevant} (filtered out)\n\n"
-        "Based on the categorized evidence, classify the claim as:\n"
-        "- Supported: If supporting evidence is strong and refuting evidence is weak/absent\n"
-        "- Contradicted: If refuting evidence is strong and supporting evidence is weak/absent\n"
-        "- Insufficient evidence: If evidence is too weak, contradictory, or mostly irrelevant\n\n"
-        "In your explanation, mention:\n"
-        "1. Key supporting/refuting evidence\n"
-        "2. Why you reached this conclusion\n"
-        "3. Any uncertainty or conflicting information\n\n"
-        f"{evidence_warning}\n"
-        f"IMPORTANT: Your entire response (verdict + explanation) must be in the language specified above.\n"
-        "Return JSON with fields: verdict, explanation."
-    )
+    system = _VERIFY_SYSTEM_TMPL.format_map({
+        "language_instruction": _LANGUAGE_INSTRUCTIONS.get(language, _LANGUAGE_INSTRUCTIONS["zh-TW"]),
+        "support_count": support_count,
+        "refute_count": refute_count,
+        "total_irrelevant": total_irrelevant,
+        "evidence_warning": evidence_warning,
+    })
 
     user = f"Claim:\n{claim}\n\n{context}"
 
-    out = call_llm(system, user)
-
-    try:
-        result = parse_json_response(out)
-        result['evidence_count'] = len(valid_results)
-        result['search_query'] = search_query
-        result['evidence_breakdown'] = {
+    return {
+        "system": system,
+        "user": user,
+        "evidence_count": evidence_count,
+        "search_query": search_query,
+        "evidence_breakdown": {
             "support": support_count,
             "refute": refute_count,
-            "irrelevant": total_irrelevant
-        }
-        if evidence_warning:
-            result['explanation'] = evidence_warning + "\n\n" + result['explanation']
-        
-        # 加入時間警告（如果有）
-        if temporal_warnings:
-            result['temporal_warning'] = temporal_warnings[0]  # 只顯示第一個警告
+            "irrelevant": total_irrelevant,
+            "duplicate": duplicates
+        },
+        "evidence_warning": evidence_warning,
+        "temporal_warnings": temporal_warnings
+    }
+
+
+def _build_fused_prompt(claim, language, filtered_results, filtered_out, duplicates, evidence_count,
+                        search_query, evidence_warning, temporal_warnings):
+    """
+    組出「立場標註 + 最終判決」合併為單次 LLM 呼叫的提示詞
+    
+    Args:
+        同 _classify_and_build_prompt
+    
+    Returns:
+        最終判決所需的資料（fused=True，立場統計由 LLM 輸出的 evidence_labels 計算）
+    """
+    to_label = [r for r in filtered_results if not r.get('_low_similarity')]
+    
+    system = _FUSED_SYSTEM_TMPL.format_map({
+        "language_instruction": _LANGUAGE_INSTRUCTIONS.get(language, _LANGUAGE_INSTRUCTIONS["zh-TW"]),
+        "evidence_count": len(to_label),
+        "evidence_warning": evidence_warning,
+    })
+    
+    evidence_lines = []
+    for i, r in enumerate(to_label, 1):
+        evidence_lines.append(f"[{i}] Title: {r['_title']}\nContent: {r['_body']}")
+    user = f"Claim:\n{claim}\n\nEvidences:\n" + "\n\n".join(evidence_lines)
+    
+    return {
+        "system": system,
+        "user": user,
+        "fused": True,
+        "labeled_count": len(to_label),
+        "evidence_count": evidence_count,
+        "search_query": search_query,
+        "evidence_breakdown": {
+            "support": 0,
+            "refute": 0,
+            "irrelevant": filtered_out + len(filtered_results) - len(to_label),
+            "duplicate": duplicates
+        },
+        "evidence_warning": evidence_warning,
+        "temporal_warnings": temporal_warnings
+    }
+
+
+def _build_verdict_result(llm_output, prepared):
+    """
+    解析最終判決的 LLM 輸出，並補上證據統計與警告
+    
+    Args:
+        llm_output: 判決 LLM 的原始輸出
+        prepared: _prepare_verification 返回的資料
+    
+    Returns:
+        verify_claim 格式的結果；合併模式的輸出無法使用時返回 None（應改用 prepared["fallback"]）
+    """
+    evidence_warning = prepared["evidence_warning"]
+    
+    if prepared.get("fused"):
+        try:
+            result = parse_json_response(llm_output)
+            labels = result.pop("evidence_labels")
+            if not isinstance(labels, list) or len(labels) != prepared["labeled_count"]:
+                return None
+            if "verdict" not in result or "explanation" not in result:
+                return None
+        except Exception:
+            return None
         
-        return result
-    except Exception as e:
+        breakdown = dict(prepared["evidence_breakdown"])
+        for label in labels:
+            breakdown[_normalize_stance(label)] += 1
+        prepared = dict(prepared, evidence_breakdown=breakdown)
+        logger.info("Support: %s, Refute: %s, Irrelevant: %s (single-pass)", breakdown['support'], breakdown['refute'], breakdown['irrelevant'])
+    
+    try:
+        result = parse_json_response(llm_output)
+        result.pop("evidence_labels", None)
+        return _finalize_verdict(result, prepared)
+    except Exception:
         return {
             "verdict": "Insufficient evidence",
             "explanation": f"Unable to parse verification result. {evidence_warning}",
-            "evidence_count": len(valid_results),
-            "search_query": search_query,
-            "evidence_breakdown": {
-                "support": support_count,
-                "refute": refute_count,
-                "irrelevant": total_irrelevant
-            }
+            "evidence_count": prepared["evidence_count"],
+            "search_query": prepared["search_query"],
+            "evidence_breakdown": dict(prepared["evidence_breakdown"])
+        }
+
+
+def _finalize_verdict(result, prepared):
+    """
+    在已解析的判決（含 verdict, explanation）上補上證據統計與警告
+    
+    Args:
+        result: 判決 dict（會被就地修改）
+        prepared: _prepare_verification 返回的資料
+    
+    Returns:
+        verify_claim 格式的結果
+    """
+    evidence_warning = prepared["evidence_warning"]
+    result['evidence_count'] = prepared["evidence_count"]
+    result['search_query'] = prepared["search_query"]
+    result['evidence_breakdown'] = dict(prepared["evidence_breakdown"])
+    if evidence_warning:
+        result['explanation'] = evidence_warning + "\n\n" + result['explanation']
+    
+    # 加入時間警告（如果有）
+    if prepared["temporal_warnings"]:
+        result['temporal_warning'] = prepared["temporal_warnings"][0]  # 只顯示第一個警告
+    
+    return result
+
+
+# 串流輸出中已完整出現的 verdict 欄位
+_VERDICT_FIELD_RE = re.compile(r'"verdict"\s*:\s*"([^"]*)"')
+
+
+def verify_claim(claim, language="zh-TW", temporal_check=True, claim_reference_date=None):
+    """
+    驗證單個主張
+    
+    Args:
+        claim: 待驗證的主張
+        language: 回應語言
+        temporal_check: 是否進行時間相關性檢查（預設開啟）
+        claim_reference_date: claim 的發布日期（用於時間檢查），None 則使用今天
+    
+    Returns:
+        {
+            "verdict": "Supported" | "Contradicted" | "Insufficient evidence" | "Temporal mismatch",
+            "explanation": str,
+            "evidence_count": int,
+            "search_query": str,
+            "evidence_breakdown": {"support": int, "refute": int, "irrelevant": int, "duplicate": int},
+            "temporal_warning": str (optional),
+            "source_type": "official" | "general" (optional),
+            "authoritative_override": bool (optional)
         }
+    """
+    result, prepared = _prepare_verification(claim, language, temporal_check, claim_reference_date)
+    if result is not None:
+        return result
+    return _complete_verification(prepared)
+
+
+def _complete_verification(prepared):
+    """
+    對已準備好的 claim 呼叫判決 LLM（合併模式輸出無法使用時退回逐一分析）
+    
+    Args:
+        prepared: _prepare_verification 返回的資料
+    
+    Returns:
+        verify_claim 格式的結果
+    """
+    out = call_llm(prepared["system"], prepared["user"], response_format="json")
+    result = _build_verdict_result(out, prepared)
+    if result is None:
+        logger.warning("Single-pass verification output unusable, falling back to per-evidence analysis")
+        prepared = prepared["fallback"]()
+        result = _build_verdict_result(call_llm(prepared["system"], prepared["user"], response_format="json"), prepared)
+    return result
+
+
+def verify_claim_stream(claim, language="zh-TW", temporal_check=True, claim_reference_date=None):
+    """
+    verify_claim 的串流版本：判決一出現就先輸出，不必等待完整說明
+    
+    Args:
+        同 verify_claim
+    
+    Yields:
+        {"verdict": str, "partial": True} - LLM 輸出中 verdict 欄位完成時（最多一次）
+        verify_claim 格式的完整結果 - 最後一筆
+    """
+    result, prepared = _prepare_verification(claim, language, temporal_check, claim_reference_date)
+    if result is not None:
+        yield result
+        return
+    
+    buffer = ""
+    verdict_sent = False
+    for chunk in call_llm_stream(prepared["system"], prepared["user"], response_format="json"):
+        buffer += chunk
+        if not verdict_sent:
+            match = _VERDICT_FIELD_RE.search(buffer)
+            if match:
+                verdict_sent = True
+                yield {"verdict": match.group(1), "partial": True}
+    
+    result = _build_verdict_result(buffer, prepared)
+    if result is None:
+        logger.warning("Single-pass verification output unusable, falling back to per-evidence analysis")
+        prepared = prepared["fallback"]()
+        result = _build_verdict_result(call_llm(prepared["system"], prepared["user"], response_format="json"), prepared)
+    yield result
+
+
+def _verify_batch(group, language):
+    """
+    以單次 LLM 呼叫判決多個已準備好的 claim
+    
+    Args:
+        group: [prepared, ...]（不超過 VERDICT_BATCH_SIZE 個）
+        language: 回應語言
+    
+    Returns:
+        與 group 順序對應的 verify_claim 格式結果；批次輸出缺漏的 claim 會個別重新判決
+    """
+    if len(group) == 1:
+        return [_complete_verification(group[0])]
+    
+    system = _BATCH_VERIFY_SYSTEM_TMPL.format_map({
+        "language_instruction": _LANGUAGE_INSTRUCTIONS.get(language, _LANGUAGE_INSTRUCTIONS["zh-TW"]),
+        "claim_count": len(group),
+    })
+    blocks = []
+    for idx, prepared in enumerate(group, 1):
+        breakdown = prepared["evidence_breakdown"]
+        blocks.append(
+            f"### Claim {idx}\n"
+            f"Evidence summary: support={breakdown['support']}, refute={breakdown['refute']}, "
+            f"irrelevant={breakdown['irrelevant']}\n"
+            f"{prepared['evidence_warning']}\n"
+            f"{prepared['user']}"
+        )
+    user = "\n\n".join(blocks)
+    
+    by_idx = {}
+    try:
+        items = parse_json_response(call_llm(system, user, response_format="json"))["results"]
+        for item in items:
+            if isinstance(item, dict) and "verdict" in item and "explanation" in item:
+                by_idx[item.get("idx")] = item
+    except Exception as e:
+        logger.warning("Batched verdict parse error: %s", e)
+    
+    results = []
+    for idx, prepared in enumerate(group, 1):
+        item = by_idx.get(idx)
+        if item is None:
+            results.append(_complete_verification(prepared))
+        else:
+            results.append(_finalize_verdict(
+                {"verdict": item["verdict"], "explanation": item["explanation"]}, prepared
+            ))
+    return results
+
+
+def verify_claims_batched(claims, language="zh-TW", batch_size=VERDICT_BATCH_SIZE, concurrency=8, **kwargs):
+    """
+    驗證多個主張：證據蒐集與立場分析並行進行，最終判決每 batch_size 個 claim 合併為一次 LLM 呼叫
+    
+    Args:
+        claims: 待驗證的主張列表
+        language: 回應語言
+        batch_size: 單次判決呼叫最多包含的 claim 數
+        concurrency: 同時處理的 claim（或判決批次）數量上限
+        **kwargs: 傳給 _prepare_verification 的其他參數（temporal_check, claim_reference_date）
+    
+    Returns:
+        與 claims 順序對應的驗證結果列表
+    """
+    results = [None] * len(claims)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        prepared_list = list(executor.map(
+            lambda claim: _prepare_verification(claim, language, **kwargs), claims
+        ))
+        
+        singles = []
+        batchable = []
+        for i, (result, prepared) in enumerate(prepared_list):
+            if result is not None:
+                results[i] = result
+            elif prepared.get("fused"):
+                # 合併模式已是單次呼叫，沿用個別判決
+                singles.append([(i, prepared)])
+            else:
+                batchable.append((i, prepared))
+        
+        groups = singles + list(_chunked(batchable, batch_size))
+        
+        group_results = executor.map(
+            lambda group: _verify_batch([prepared for _, prepared in group], language), groups
+        )
+        for group, verdicts in zip(groups, group_results):
+            for (i, _), verdict in zip(group, verdicts):
+                results[i] = verdict
+    
+    return results
+
+
+async def verify_claims_async(claims, concurrency=8, **kwargs):
+    """
+    並行驗證多個主張（每個 claim 在背景 thread 執行 verify_claim）
+    
+    Args:
+        claims: 待驗證的主張列表
+        concurrency: 同時驗證的 claim 數量上限
+        **kwargs: 傳給 verify_claim 的其他參數（language, temporal_check, ...）
+    
+    Returns:
+        與 claims 順序對應的驗證結果列表
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(claims)
+    
+    async def verify_one(index, claim):
+        async with semaphore:
+            results[index] = await asyncio.to_thread(verify_claim, claim, **kwargs)
+    
+    await asyncio.gather(*(verify_one(i, claim) for i, claim in enumerate(claims)))
+    return results
+
+
+def verify_claims(claims, concurrency=8, **kwargs):
+    """
+    verify_claims_async 的同步版本
+    
+    Args:
+        claims: 待驗證的主張列表
+        concurrency: 同時驗證的 claim 數量上限
+        **kwargs: 傳給 verify_claim 的其他參數
+    
+    Returns:
+        與 claims 順序對應的驗證結果列表
+    """
+    return asyncio.run(verify_claims_async(claims, concurrency=concurrency, **kwargs))
@@ -2,7 +2,80 @@
 Claim and Detail Extractors
 從文本中提取可驗證的主張和細節
 """
-from llm_helpers import call_llm, parse_json_response
+import json
+import logging
+import re
+from llm_helpers import call_llm, call_llm_stream, parse_json_response
+
+logger = logging.getLogger(__name__)
+
+# 串流解析：定位 "details": [ 之後逐一擷取已完整輸出的字串
+_DETAILS_ARRAY_RE = re.compile(r'"details"\s*:\s*\[')
+_json_decoder = json.JSONDecoder()
+
+# 解析失敗時從原文取標題
+_TITLE_LINE_RE = re.compile(r"^Title:[ \t]*(.*)$", re.MULTILINE)
+
+MAX_DETAILS = 5
+
+# 各語言的 system prompt 在載入時組好，呼叫時直接查表
+_TITLE_DETAILS_SYSTEM_TMPL = (
+    "{language_instruction}\n\n"
+    "You are analyzing a news article to extract:\n"
+    "1. The TITLE (main claim of the article)\n"
+    "2. VERIFIABLE DETAILS that DIRECTLY SUPPORT the title's core claim\n\n"
+    "CRITICAL RULES:\n"
+    "1. Extract ONLY from the provided text - DO NOT add information from your knowledge\n"
+    "2. Details must be EXACT quotes or paraphrases from the CONTENT section\n"
+    "3. If title claims '3000 police deployed' → find WHERE in content it mentions specific numbers\n"
+    "4. DO NOT infer, guess, or add details not explicitly stated in the text\n"
+    "5. DO NOT extract peripheral details that don't directly prove the title's main claim\n"
+    "6. DO NOT extract time/date information alone - combine it with factual content\n\n"
+    "Details should be:\n"
+    "- Specific numbers FOUND IN THE TEXT (e.g., '1300 police', '2900 MRT staff')\n"
+    "- Key events MENTIONED IN THE TEXT that directly relate to the title\n"
+    "- Evidence FROM THE TEXT that confirms or refutes the title's core assertion\n"
+    "- If extracting time-related info, combine it with the event (e.g., 'Earthquake occurred at 11:27 PM on Dec 31' not just 'Dec 31, 11:27 PM')\n\n"
+    "Extract 2-4 key details (quality over quantity).\n"
+    "Ignore: peripheral details, opinions, vague statements, minor supporting facts.\n\n"
+    "IMPORTANT: If the content doesn't contain enough specific details to support the title, return fewer details or empty array.\n"
+    "DO NOT fabricate or guess details not present in the text.\n\n"
+    "Return JSON with fields: title (string), details (array of strings).\n"
+    "The extracted title and details MUST be in the language specified above."
+)
+
+_CLAIMS_SYSTEM_TMPL = (
+    "{language_instruction}\n\n"
+    "Extract 3-5 verifiable factual claims from the PROVIDED TEXT ONLY.\n\n"
+    "CRITICAL: Extract ONLY from the text - DO NOT add information from your knowledge.\n\n"
+    "Focus on:\n"
+    "- Specific events MENTIONED IN THE TEXT\n"
+    "- Concrete numbers or statistics STATED IN THE TEXT\n"
+    "- Statements FROM THE TEXT that can be fact-checked\n\n"
+    "Ignore:\n"
+    "- Opinions or subjective statements\n"
+    "- Vague or unclear claims\n"
+    "- Repeated information\n"
+    "- Information not explicitly present in the text\n\n"
+    "DO NOT infer, extrapolate, or add claims based on your general knowledge.\n"
+    "If the text contains fewer than 3 verifiable claims, return fewer items.\n\n"
+    "Return a JSON array of strings (the claims).\n"
+    "The extracted claims MUST be in the language specified above."
+)
+
+_TITLE_DETAILS_SYSTEMS = {
+    "zh-TW": _TITLE_DETAILS_SYSTEM_TMPL.format(
+        language_instruction="CRITICAL: Extract title and details in Traditional Chinese (繁體中文)."),
+    "en": _TITLE_DETAILS_SYSTEM_TMPL.format(
+        language_instruction="CRITICAL: Extract title and details in English."),
+}
+
+_CLAIMS_SYSTEMS = {
+    "zh-TW": _CLAIMS_SYSTEM_TMPL.format(
+        language_instruction="CRITICAL: Extract claims in Traditional Chinese (繁體中文)."),
+    "en": _CLAIMS_SYSTEM_TMPL.format(
+        language_instruction="CRITICAL: Extract claims in English."),
+}
 
 
 def extract_title_and_details(text, language="zh-TW", extract_time=False):
@@ -19,45 +92,92 @@ def extract_title_and_details(text, language="zh-TW", extract_time=False):
     Returns:
         {"title": str, "details": [str, ...]}
     """
-    # 根據語言設定回應語言
-    language_instruction = ""
-    if language == "zh-TW":
-        language_instruction = "CRITICAL: Extract title and details in Traditional Chinese (繁體中文)."
-    elif language == "en":
-        language_instruction = "CRITICAL: Extract title and details in English."
-    else:
-        language_instruction = "CRITICAL: Extract title and details in Traditional Chinese (繁體中文)."
+    out = call_llm(_title_and_details_system(language), text, response_format="json")
+    return _parse_title_and_details(out, text)
+
+
+def stream_title_and_details(text, language="zh-TW", result=None):
+    """
+    以串流模式提取標題和細節：LLM 每輸出完一個細節就立即產生，
+    讓呼叫端在提取完成前就能開始驗證
+    
+    Args:
+        text: 新聞文章全文（包含 Title: 和 Content: 標記）
+        language: 輸出語言（zh-TW, en, auto）
+        result: 選用的 dict，串流結束後填入 {"title": str, "details": [str, ...]}
+    
+    Yields:
+        細節字串（依 LLM 輸出順序，最多 MAX_DETAILS 個）
+    """
+    buffer = ""
+    pos = None      # details 陣列中下一個待解析的位置
+    done = False    # 陣列已結束或遇到非字串項目，改由完整解析處理
+    yielded = []
+    
+    for chunk in call_llm_stream(_title_and_details_system(language), text, response_format="json"):
+        buffer += chunk
+        if done:
+            continue
+        if pos is None:
+            match = _DETAILS_ARRAY_RE.search(buffer)
+            if match is None:
+                continue
+            pos = match.end()
+        
+        while len(yielded) < MAX_DETAILS:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] != '"':
+                done = True
+                break
+            try:
+                detail, pos = _json_decoder.raw_decode(buffer, pos)
+            except ValueError:
+                break  # 字串尚未輸出完整，等待下一個片段
+            yielded.append(detail)
+            yield detail
+    
+    extraction = _parse_title_and_details(buffer, text)
+    # 串流階段未能擷取的細節（例如格式不符預期）在此補上
+    for detail in extraction["details"]:
+        if detail not in yielded and len(yielded) < MAX_DETAILS:
+            yielded.append(detail)
+            yield detail
+    extraction["details"] = yielded
+    
+    if result is not None:
+        result.update(extraction)
+
+
+def _title_and_details_system(language):
+    """
+    組出標題與細節提取的 system prompt
     
-    system = (
-        f"{language_instruction}\n\n"
-        "You are analyzing a news article to extract:\n"
-        "1. The TITLE (main claim of the article)\n"
-        "2. VERIFIABLE DETAILS that DIRECTLY SUPPORT the title's core claim\n\n"
-        "CRITICAL RULES:\n"
-        "1. Extract ONLY from the provided text - DO NOT add information from your knowledge\n"
-        "2. Details must be EXACT quotes or paraphrases from the CONTENT section\n"
-        "3. If title claims '3000 police deployed' → find WHERE in content it mentions specific numbers\n"
-        "4. DO NOT infer, guess, or add details not explicitly stated in the text\n"
-        "5. DO NOT extract peripheral details that don't directly prove the title's main claim\n"
-        "6. DO NOT extract time/date information alone - combine it with factual content\n\n"
-        "Details should be:\n"
-        "- Specific numbers FOUND IN THE TEXT (e.g., '1300 police', '2900 MRT staff')\n"
-        "- Key events MENTIONED IN THE TEXT that directly relate to the title\n"
-        "- Evidence FROM THE TEXT that confirms or refutes the title's core assertion\n"
-        "- If extracting time-related info, combine it with the event (e.g., 'Earthquake occurred at 11:27 PM on Dec 31' not just 'Dec 31, 11:27 PM')\n\n"
-        "Extract 2-4 key details (quality over quantity).\n"
-        "Ignore: peripheral details, opinions, vague statements, minor supporting facts.\n\n"
-        "IMPORTANT: If the content doesn't contain enough specific details to support the title, return fewer details or empty array.\n"
-        "DO NOT fabricate or guess details not present in the text.\n\n"
-        "Return JSON with fields: title (string), details (array of strings).\n"
-        "The extracted title and details MUST be in the language specified above."
-    )
+    Args:
+        language: 輸出語言（zh-TW, en, auto）
     
-    out = call_llm(system, text)
+    Returns:
+        system prompt 字串
+    """
+    return _TITLE_DETAILS_SYSTEMS.get(language, _TITLE_DETAILS_SYSTEMS["zh-TW"])
 
+
+def _parse_title_and_details(out, text):
+    """
+    解析標題與細節提取的 LLM 回應
+    
+    Args:
+        out: LLM 的原始輸出
+        text: 原始新聞文本（解析失敗時從 Title: 行取標題）
+    
+    Returns:
+        {"title": str, "details": [str, ...]}
+    """
     try:
         # Debug: 顯示 LLM 原始回應
-        print(f"  LLM Response (first 500 chars): {out[:500]}")
+        logger.debug("LLM Response (first 500 chars): %s", out[:500])
         
         result = parse_json_response(out)
         title = result.get("title", "")
@@ -65,26 +185,22 @@ def extract_title_and_details(text, language="zh-TW", extract_time=False):
         
         # 確保 details 是 list
         if not isinstance(details, list):
-            print(f"  Warning: details is not a list, got {type(details)}")
+            logger.warning("details is not a list, got %s", type(details))
             details = []
         
         # 限制最多5個細節
-        details = details[:5]
+        details = details[:MAX_DETAILS]
         
-        print(f"  Extracted: title={title[:50]}..., details count={len(details)}")
+        logger.info("Extracted: title=%s..., details count=%s", title[:50], len(details))
         
         return {"title": title, "details": details}
     except Exception as e:
-        print(f"  Error parsing LLM response: {e}")
-        print(f"  Raw output: {out[:300]}")
+        logger.warning("Error parsing LLM response: %s", e)
+        logger.debug("Raw output: %s", out[:300])
         
         # 備用：嘗試從文本中提取Title行
-        lines = text.split('\n')
-        title = ""
-        for line in lines:
-            if line.startswith("Title:"):
-                title = line.replace("Title:", "").strip()
-                break
+        match = _TITLE_LINE_RE.search(text)
+        title = match.group(1).strip() if match else ""
         
         return {"title": title or "Unknown", "details": []}
 
@@ -101,33 +217,7 @@ def extract_claims(text, language="zh-TW"):
     Returns:
         [str, str, ...] - claim 列表
     """
-    # 根據語言設定回應語言
-    language_instruction = ""
-    if language == "zh-TW":
-        language_instruction = "CRITICAL: Extract claims in Traditional Chinese (繁體中文)."
-    elif language == "en":
-        language_instruction = "CRITICAL: Extract claims in English."
-    else:
-        language_instruction = "CRITICAL: Extract claims in Traditional Chinese (繁體中文)."
-    
-    system = (
-        f"{language_instruction}\n\n"
-        "Extract 3-5 verifiable factual claims from the PROVIDED TEXT ONLY.\n\n"
-        "CRITICAL: Extract ONLY from the text - DO NOT add information from your knowledge.\n\n"
-        "Focus on:\n"
-        "- Specific events MENTIONED IN THE TEXT\n"
-        "- Concrete numbers or statistics STATED IN THE TEXT\n"
-        "- Statements FROM THE TEXT that can be fact-checked\n\n"
-        "Ignore:\n"
-        "- Opinions or subjective statements\n"
-        "- Vague or unclear claims\n"
-        "- Repeated information\n"
-        "- Information not explicitly present in the text\n\n"
-        "DO NOT infer, extrapolate, or add claims based on your general knowledge.\n"
-        "If the text contains fewer than 3 verifiable claims, return fewer items.\n\n"
-        "Return a JSON array of strings (the claims).\n"
-        "The extracted claims MUST be in the language specified above."
-    )
+    system = _CLAIMS_SYSTEMS.get(language, _CLAIMS_SYSTEMS["zh-TW"])
     
     try:
         out = call_llm(system, text)
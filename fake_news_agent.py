@@ -2,10 +2,118 @@
 Fake News Verification Agent (Refactored)
 主流程和協調邏輯，委派具體任務給專門模組
 """
-import json
-from llm_helpers import call_llm, parse_json_response
-from extractors import extract_title_and_details, extract_claims
-from evidence_processor import verify_claim
+import asyncio
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm_helpers import call_llm, parse_json_response, json_dumps_pretty, LLM_MAX_CONCURRENCY
+from extractors import stream_title_and_details, extract_claims
+from evidence_processor import verify_claim, verify_claims_batched, BATCHED_VERIFICATION
+from local_models import embed_texts
+from logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+# 細節去重：正規化後完全相同者只驗證一次；開啟 SEMANTIC_DETAIL_DEDUPE 時，
+# 句向量相似度 >= SEMANTIC_DETAIL_DEDUPE_THRESHOLD 者也視為重複（需 sentence-transformers）
+SEMANTIC_DETAIL_DEDUPE = os.getenv("SEMANTIC_DETAIL_DEDUPE", "0") == "1"
+SEMANTIC_DETAIL_DEDUPE_THRESHOLD = float(os.getenv("SEMANTIC_DETAIL_DEDUPE_THRESHOLD", "0.9"))
+
+# 判斷是否為新聞文章時，只在前段尋找 "Title:" / "Content:" 標記
+NEWS_MARKER_SCAN_CHARS = 4096
+
+_DEDUPE_STRIP_RE = re.compile(r"[\s。．.，,！!？?；;、「」\"']+")
+
+
+class _DetailDeduper:
+    """逐一加入細節，判斷是否與先前的細節重複（回傳代表項目的索引）"""
+    
+    def __init__(self, semantic=SEMANTIC_DETAIL_DEDUPE, threshold=SEMANTIC_DETAIL_DEDUPE_THRESHOLD):
+        self.semantic = semantic
+        self.threshold = threshold
+        self.count = 0
+        self._keys = {}
+        self._vectors = []
+    
+    def add(self, text):
+        """
+        Args:
+            text: 細節文字
+        
+        Returns:
+            (代表項目索引, 是否為新項目)
+        """
+        key = _DEDUPE_STRIP_RE.sub("", str(text)).lower()
+        if key in self._keys:
+            return self._keys[key], False
+        
+        vector = None
+        if self.semantic:
+            vectors = embed_texts([str(text)])
+            if vectors is not None:
+                vector = vectors[0]
+                for rep, other in self._vectors:
+                    if float(vector @ other) >= self.threshold:
+                        self._keys[key] = rep
+                        return rep, False
+        
+        rep = self.count
+        self.count += 1
+        self._keys[key] = rep
+        if vector is not None:
+            self._vectors.append((rep, vector))
+        return rep, True
+
+
+# 回應語言指示與標題判斷的 system prompt 模板（呼叫時只填入動態欄位）
+_LANGUAGE_INSTRUCTIONS = {
+    "zh-TW": "CRITICAL: You MUST respond in Traditional Chinese (繁體中文). All explanations must be in Traditional Chinese.",
+    "en": "CRITICAL: You MUST respond in English. All explanations must be in English.",
+}
+
+# 細節結果一面倒時（不呼叫 LLM）使用的標題判斷說明
+_DECISIVE_EXPLANATIONS = {
+    "zh-TW": {
+        "MISLEADING": "{contradicted} 個細節被證據反駁，且沒有任何細節獲得支持，標題可能不實或具誤導性。",
+        "CREDIBLE": "全部 {total} 個細節皆獲得證據支持，標題可信。",
+        "UNCERTAIN": "{total} 個細節皆缺乏足夠證據，無法判斷標題可信度。",
+        "NO_DETAILS": "未能從內文提取可驗證的細節，無法判斷標題可信度。",
+        "DETAIL_LINE": "{index}. {detail}（{verdict}）",
+    },
+    "en": {
+        "MISLEADING": "{contradicted} details are contradicted by evidence and none are supported; the title is likely false or misleading.",
+        "CREDIBLE": "All {total} details are supported by evidence; the title is credible.",
+        "UNCERTAIN": "None of the {total} details has sufficient evidence; the title's credibility cannot be determined.",
+        "NO_DETAILS": "No verifiable details could be extracted from the content; the title's credibility cannot be determined.",
+        "DETAIL_LINE": "{index}. {detail} ({verdict})",
+    },
+}
+
+_JUDGE_TITLE_SYSTEM_TMPL = (
+    "{language_instruction}\n\n"
+    "You are judging whether a news article's TITLE is credible based on the verification of specific details from the content.\n\n"
+    "Title to judge: {title}\n\n"
+    "Details verification summary:\n"
+    "- Supported: {supported}\n"
+    "- Contradicted: {contradicted}\n"
+    "- Insufficient evidence: {insufficient}\n\n"
+    "Decision logic:\n"
+    "- If most details are SUPPORTED → Title is likely TRUE\n"
+    "- If key details are CONTRADICTED → Title is FALSE or MISLEADING\n"
+    "- If most details lack evidence → Cannot determine title credibility\n\n"
+    "Classify the title as:\n"
+    "- CREDIBLE: Strong evidence supports the title\n"
+    "- MISLEADING: Evidence contradicts or undermines the title\n"
+    "- UNCERTAIN: Insufficient evidence to judge\n\n"
+    "In your explanation:\n"
+    "1. Which details support/contradict the title\n"
+    "2. Overall assessment of title accuracy\n"
+    "3. Any caveats or uncertainties\n\n"
+    "Return JSON with fields: credibility (CREDIBLE/MISLEADING/UNCERTAIN), explanation.\n"
+    "Your entire response must be in the language specified at the top."
+)
 
 
 class FakeNewsAgent:
@@ -41,50 +149,31 @@ class FakeNewsAgent:
         for detail in detail_results:
             detail_counts[detail["verdict"]] += 1
         
-        # 根據語言設定回應語言
-        language_instruction = ""
-        if language == "zh-TW":
-            language_instruction = "CRITICAL: You MUST respond in Traditional Chinese (繁體中文). All explanations must be in Traditional Chinese."
-        elif language == "en":
-            language_instruction = "CRITICAL: You MUST respond in English. All explanations must be in English."
-        else:
-            language_instruction = "CRITICAL: You MUST respond in Traditional Chinese (繁體中文). All explanations must be in Traditional Chinese."
+        # 結果一面倒時直接依規則判斷，不呼叫 LLM
+        decisive = self._decisive_title_verdict(detail_results, detail_counts, language)
+        if decisive is not None:
+            return decisive
         
         # 建立細節摘要給LLM
-        details_summary = ""
-        for i, detail in enumerate(detail_results, 1):
-            details_summary += f"{i}. {detail['detail']}\n"
-            details_summary += f"   Verdict: {detail['verdict']}\n"
-            details_summary += f"   Brief: {detail['explanation'][:100]}...\n\n"
-        
-        system = (
-            f"{language_instruction}\n\n"
-            "You are judging whether a news article's TITLE is credible based on the verification of specific details from the content.\n\n"
-            f"Title to judge: {title}\n\n"
-            f"Details verification summary:\n"
-            f"- Supported: {detail_counts['Supported']}\n"
-            f"- Contradicted: {detail_counts['Contradicted']}\n"
-            f"- Insufficient evidence: {detail_counts['Insufficient evidence']}\n\n"
-            "Decision logic:\n"
-            "- If most details are SUPPORTED → Title is likely TRUE\n"
-            "- If key details are CONTRADICTED → Title is FALSE or MISLEADING\n"
-            "- If most details lack evidence → Cannot determine title credibility\n\n"
-            "Classify the title as:\n"
-            "- CREDIBLE: Strong evidence supports the title\n"
-            "- MISLEADING: Evidence contradicts or undermines the title\n"
-            "- UNCERTAIN: Insufficient evidence to judge\n\n"
-            "In your explanation:\n"
-            "1. Which details support/contradict the title\n"
-            "2. Overall assessment of title accuracy\n"
-            "3. Any caveats or uncertainties\n\n"
-            "Return JSON with fields: credibility (CREDIBLE/MISLEADING/UNCERTAIN), explanation.\n"
-            "Your entire response must be in the language specified at the top."
+        details_summary = "".join(
+            f"{i}. {detail['detail']}\n"
+            f"   Verdict: {detail['verdict']}\n"
+            f"   Brief: {detail['explanation'][:100]}...\n\n"
+            for i, detail in enumerate(detail_results, 1)
         )
         
+        system = _JUDGE_TITLE_SYSTEM_TMPL.format_map({
+            "language_instruction": _LANGUAGE_INSTRUCTIONS.get(language, _LANGUAGE_INSTRUCTIONS["zh-TW"]),
+            "title": title,
+            "supported": detail_counts["Supported"],
+            "contradicted": detail_counts["Contradicted"],
+            "insufficient": detail_counts["Insufficient evidence"],
+        })
+        
         user = f"Details verification:\n{details_summary}"
         
         try:
-            out = call_llm(system, user)
+            out = call_llm(system, user, response_format="json")
             result = parse_json_response(out)
             
             # 標準化credibility值
@@ -121,6 +210,49 @@ class FakeNewsAgent:
                 "detail_summary": detail_counts
             }
     
+    def _decisive_title_verdict(self, detail_results, detail_counts, language="zh-TW"):
+        """
+        細節結果一面倒時，以規則產生標題判斷（含模板說明）
+        
+        - 至少 2 個細節被反駁且沒有細節被支持 → MISLEADING
+        - 所有細節皆被支持 → CREDIBLE
+        - 沒有可驗證的細節，或所有細節皆證據不足 → UNCERTAIN
+        
+        Args:
+            detail_results: 細節驗證結果列表
+            detail_counts: 各判決的數量
+            language: 回應語言
+        
+        Returns:
+            judge_title_from_details 格式的結果；結果混合需要 LLM 判斷時返回 None
+        """
+        total = len(detail_results)
+        if total == 0:
+            credibility, reason = "UNCERTAIN", "NO_DETAILS"
+        elif detail_counts["Contradicted"] >= 2 and detail_counts["Supported"] == 0:
+            credibility, reason = "MISLEADING", "MISLEADING"
+        elif detail_counts["Supported"] == total:
+            credibility, reason = "CREDIBLE", "CREDIBLE"
+        elif detail_counts["Insufficient evidence"] == total:
+            credibility, reason = "UNCERTAIN", "UNCERTAIN"
+        else:
+            return None
+        
+        templates = _DECISIVE_EXPLANATIONS.get(language, _DECISIVE_EXPLANATIONS["zh-TW"])
+        lines = [templates[reason].format(
+            total=total,
+            supported=detail_counts["Supported"],
+            contradicted=detail_counts["Contradicted"],
+        )]
+        for i, detail in enumerate(detail_results, 1):
+            lines.append(templates["DETAIL_LINE"].format(index=i, detail=detail['detail'], verdict=detail['verdict']))
+        
+        return {
+            "overall_credibility": credibility,
+            "explanation": "\n".join(lines),
+            "detail_summary": detail_counts
+        }
+    
     def aggregate_results(self, results):
         """
         統計並彙總多個 claim 的驗證結果
@@ -144,6 +276,73 @@ class FakeNewsAgent:
 
         return credibility, counts
     
+    def _verify_all(self, items, label, language, temporal_check, publish_date):
+        """
+        並行驗證多個細節／主張：每個項目一取得就送出驗證，完成時立即回報進度
+        重複的項目只驗證一次，結果複製給所有重複項目
+        
+        Args:
+            items: 待驗證的字串（list 或逐一產生的 iterable）
+            label: 進度訊息中的名稱（"Detail" / "Claim"）
+            language: 回應語言
+            temporal_check: 是否進行時間相關性檢查
+            publish_date: 參考日期
+        
+        Returns:
+            (items, verifications) - 與 items 順序對應的驗證結果
+        """
+        deduper = _DetailDeduper()
+        submitted = []
+        owners = []     # 每個項目對應的代表項目索引
+        unique = []     # 代表項目（實際送出驗證者）
+        
+        if BATCHED_VERIFICATION:
+            # 批次判決需要先取得全部項目
+            for item in items:
+                rep, is_new = deduper.add(item)
+                submitted.append(item)
+                owners.append(rep)
+                if is_new:
+                    unique.append(item)
+            rep_results = verify_claims_batched(
+                unique,
+                language=language,
+                concurrency=LLM_MAX_CONCURRENCY,
+                temporal_check=temporal_check,
+                claim_reference_date=publish_date
+            )
+            for i, verification in enumerate(rep_results, 1):
+                logger.info("✓ %s %d/%d: %s (%d sources)", label, i, len(unique),
+                            verification['verdict'], verification.get('evidence_count', 0))
+        else:
+            with ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY) as executor:
+                futures = {}
+                for item in items:
+                    rep, is_new = deduper.add(item)
+                    submitted.append(item)
+                    owners.append(rep)
+                    if not is_new:
+                        continue
+                    unique.append(item)
+                    futures[executor.submit(
+                        verify_claim,
+                        item,
+                        language=language,
+                        temporal_check=temporal_check,
+                        claim_reference_date=publish_date
+                    )] = rep
+                
+                rep_results = [None] * len(unique)
+                for future in as_completed(futures):
+                    rep = futures[future]
+                    rep_results[rep] = future.result()
+                    logger.info("✓ %s %d/%d: %s (%d sources)", label, rep + 1, len(unique),
+                                rep_results[rep]['verdict'], rep_results[rep].get('evidence_count', 0))
+        
+        if len(unique) < len(submitted):
+            logger.info("Skipped %s duplicate %s(s)", len(submitted) - len(unique), label.lower())
+        return submitted, [rep_results[rep] for rep in owners]
+    
     def run(self, text, language="zh-TW", temporal_check=True, publish_date=None):
         """
         主流程：自動偵測輸入類型並執行驗證
@@ -157,39 +356,34 @@ class FakeNewsAgent:
         Returns:
             驗證結果字典（格式取決於模式）
         """
-        # 偵測是否為新聞文章結構（包含 "Title:" 和 "Content:"）
-        is_news_article = ("Title:" in text and "Content:" in text)
+        # 偵測是否為新聞文章結構（包含 "Title:" 和 "Content:"；標記位於開頭，只檢查前段）
+        head = text[:NEWS_MARKER_SCAN_CHARS]
+        is_news_article = head.find("Title:") != -1 and head.find("Content:") != -1
         
         if is_news_article:
             # === 模式 A: 新聞文章驗證（三層架構）===
-            print("[MODE] News Article Verification (Title→Details→Evidence)\n")
+            logger.info("[MODE] News Article Verification (Title→Details→Evidence)")
             
             if publish_date:
-                print(f"News publish date: {publish_date}")
+                logger.info("News publish date: %s", publish_date)
             
-            print("Step 1: Extract title and verifiable details...")
-            extraction = extract_title_and_details(text, language=language, extract_time=False)
-            title = extraction["title"]
-            details = extraction["details"]
+            # Step 1 + 2: 串流提取細節，每個細節一產生就開始驗證（使用新聞發布日期作為參考點）
+            logger.info("Step 1: Extract title and verifiable details (streaming)...")
+            logger.info("Step 2: Verify each detail as soon as it is extracted...")
+            extraction = {}
+            details, verifications = self._verify_all(
+                stream_title_and_details(text, language=language, result=extraction),
+                "Detail", language, temporal_check, publish_date
+            )
+            title = extraction.get("title") or "Unknown"
             
-            print(f"Title: {title}")
-            print(f"Found {len(details)} verifiable details")
-            print()
+            logger.info("Title: %s", title)
+            logger.info("Verified %s details", len(details))
 
-            # Step 2: Verify each detail
             detail_results = []
             temporal_warnings = []
             
-            for i, detail in enumerate(details, 1):
-                print(f"Step 2.{i}: Verify detail {i}/{len(details)}")
-                print(f"  Detail: {detail[:80]}...")
-                verification = verify_claim(
-                    detail, 
-                    language=language,
-                    temporal_check=temporal_check,
-                    claim_reference_date=publish_date  # 使用新聞發布日期作為參考點
-                )
-                
+            for i, (detail, verification) in enumerate(zip(details, verifications), 1):
                 detail_result = {
                     "detail": detail,
                     "verdict": verification["verdict"],
@@ -205,14 +399,13 @@ class FakeNewsAgent:
                     temporal_warnings.append(f"Detail {i}: {verification['temporal_warning']}")
                 
                 detail_results.append(detail_result)
-                print(f"  Verdict: {verification['verdict']} ({verification.get('evidence_count', 0)} sources)\n")
 
             # Step 3: Aggregate to judge title
-            print(f"Step 3: Judging title based on detail verification...")
+            logger.info("Step 3: Judging title based on detail verification...")
             title_verdict = self.judge_title_from_details(title, detail_results, language)
             
-            print(f"  Title credibility: {title_verdict['overall_credibility']}")
-            print(f"  Detail statistics: {title_verdict['detail_summary']}\n")
+            logger.info("Title credibility: %s", title_verdict['overall_credibility'])
+            logger.info("Detail statistics: %s", title_verdict['detail_summary'])
             
             result = {
                 "mode": "news_article",
@@ -226,31 +419,28 @@ class FakeNewsAgent:
             # 加入時間警告（如果有）
             if temporal_warnings:
                 result["temporal_warnings"] = temporal_warnings
-                print(f"⚠️ 時間異常警告: {len(temporal_warnings)} 個細節有時間不符問題\n")
+                logger.warning("⚠️ 時間異常警告: %s 個細節有時間不符問題", len(temporal_warnings))
             
             return result
         
         else:
             # === 模式 B: 一般文字驗證（claim-based）===
-            print("[MODE] Plain Text Verification (Claim-based)\n")
-            print("Step 1: Extract verifiable claims...")
+            logger.info("[MODE] Plain Text Verification (Claim-based)")
+            logger.info("Step 1: Extract verifiable claims...")
             claims = extract_claims(text, language=language)
-            print(f"Found {len(claims)} claims\n")
+            logger.info("Found %s claims", len(claims))
 
             # Step 2: Verify each claim
             results = []
             temporal_warnings = []
             
-            for i, claim in enumerate(claims, 1):
-                print(f"Step 2: Verify claim {i}/{len(claims)}")
-                print(f"  Claim: {claim[:80]}...")
-                verification = verify_claim(
-                    claim, 
-                    language=language,
-                    temporal_check=temporal_check,
-                    claim_reference_date=publish_date  # 使用發布日期（一般文字可能沒有）
-                )
-                
+            # 各 claim 彼此獨立，並行驗證（使用發布日期，一般文字可能沒有）
+            logger.info("Step 2: Verify %s claims concurrently...", len(claims))
+            claims, verifications = self._verify_all(
+                claims, "Claim", language, temporal_check, publish_date
+            )
+            
+            for i, (claim, verification) in enumerate(zip(claims, verifications), 1):
                 result_item = {
                     "claim": claim,
                     "verdict": verification["verdict"],
@@ -266,13 +456,12 @@ class FakeNewsAgent:
                     temporal_warnings.append(f"Claim {i}: {verification['temporal_warning']}")
                 
                 results.append(result_item)
-                print(f"  Verdict: {verification['verdict']} ({verification.get('evidence_count', 0)} sources)\n")
 
             # Step 3: Aggregate results
-            print("Step 3: Aggregating results...")
+            logger.info("Step 3: Aggregating results...")
             credibility, counts = self.aggregate_results(results)
-            print(f"  Overall credibility: {credibility}")
-            print(f"  Verdict statistics: {counts}\n")
+            logger.info("Overall credibility: %s", credibility)
+            logger.info("Verdict statistics: %s", counts)
 
             summary = (
                 f"Supported: {counts['Supported']}, "
@@ -290,13 +479,32 @@ class FakeNewsAgent:
             # 加入時間警告（如果有）
             if temporal_warnings:
                 result["temporal_warnings"] = temporal_warnings
-                print(f"⚠️ 時間異常警告: {len(temporal_warnings)} 個 claim 有時間不符問題\n")
+                logger.warning("⚠️ 時間異常警告: %s 個 claim 有時間不符問題", len(temporal_warnings))
             
             return result
+    
+    async def arun(self, text, language="zh-TW", temporal_check=True, publish_date=None):
+        """
+        run 的非同步版本（在背景 thread 執行，不阻塞 event loop）
+        
+        Args:
+            同 run
+        
+        Returns:
+            驗證結果字典（格式取決於模式）
+        """
+        return await asyncio.to_thread(
+            self.run,
+            text,
+            language=language,
+            temporal_check=temporal_check,
+            publish_date=publish_date
+        )
 
 
 # ---------- For testing in terminal ----------
 def main():
+    configure_logging()
     agent = FakeNewsAgent()
     print("Fake News Verification Agent (Terminal Mode)")
     print("Type 'quit' to exit.")
@@ -308,7 +516,7 @@ def main():
             break
 
         result = agent.run(text)
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        print(json_dumps_pretty(result))
 
 
 if __name__ == "__main__":
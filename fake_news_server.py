@@ -1,9 +1,34 @@
+import logging
+import os
+import threading
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from fake_news_agent import FakeNewsAgent
-from qa_agent import QAAgent
+from logging_setup import configure_logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """使用 orjson 進行 jsonify / request.get_json 的序列化"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 
 CORS(
     app,
@@ -13,7 +38,20 @@ CORS(
 )
 
 agent = FakeNewsAgent()
-qa_agent = QAAgent()
+
+_qa_agent = None
+_qa_agent_lock = threading.Lock()
+
+
+def get_qa_agent():
+    """QA 模式較少使用，第一次收到 QA 請求時才匯入並建立 QAAgent"""
+    global _qa_agent
+    with _qa_agent_lock:
+        if _qa_agent is None:
+            from qa_agent import QAAgent
+            _qa_agent = QAAgent()
+        return _qa_agent
+
 
 @app.route("/verify", methods=["POST", "OPTIONS"])
 def verify():
@@ -27,9 +65,9 @@ def verify():
     language = data.get("language", "zh-TW")  # 預設繁體中文
     publish_date = data.get("publishDate")  # 新聞發布日期（可選）
 
-    print(
-        f"[POST /verify] mode={mode}, language={language}, "
-        f"text_length={len(text)}, publishDate={publish_date}"
+    logger.info(
+        "[POST /verify] mode=%s, language=%s, text_length=%d, publishDate=%s",
+        mode, language, len(text), publish_date
     )
 
     if not text:
@@ -37,7 +75,7 @@ def verify():
 
     if mode == "qa":
         # ---- QA MODE ----
-        qa_result = qa_agent.search_and_answer(
+        qa_result = get_qa_agent().search_and_answer(
             question=text,
             use_search=None
         )
@@ -65,5 +103,18 @@ def health():
 
 
 if __name__ == "__main__":
-    print("🚀 Starting Fake News Agent Server on http://127.0.0.1:5000")
-    app.run(host="127.0.0.1", port=5000, debug=False)
+    host, port = "127.0.0.1", 5000
+    # 每個 /verify 請求會長時間等待 LLM 與搜尋（IO），以多執行緒同時處理多個請求
+    threads = int(os.getenv("SERVER_THREADS", "16"))
+
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+
+    print(f"🚀 Starting Fake News Agent Server on http://{host}:{port}")
+    if serve is not None:
+        serve(app, host=host, port=port, threads=threads)
+    else:
+        # 未安裝 waitress 時使用 Flask 內建伺服器（每個請求一個執行緒）
+        app.run(host=host, port=port, debug=False, threaded=True)
@@ -0,0 +1,104 @@
+"""
+LLM Response Cache
+以 SQLite 持久化 LLM 回應，相同 (model, system, user, 輸出格式) 不重複呼叫 API
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class LLMCache:
+    """
+    LLM 回應的精確比對快取
+
+    - Key: sha256(model + system + user + response_format)
+    - 過期：超過 ttl 秒的項目視為未命中
+    - 淘汰：超過 max_entries 時刪除最久未使用的項目（LRU）
+    """
+
+    def __init__(self, path, ttl=24 * 3600, max_entries=10000):
+        """
+        Args:
+            path: SQLite 檔案路徑
+            ttl: 快取有效秒數
+            max_entries: 最多保留的項目數
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model, system_prompt, user_prompt, response_format=None):
+        """計算快取 key（輸出格式限制不同的請求不共用快取）"""
+        raw = json.dumps(
+            {"model": model, "system": system_prompt, "user": user_prompt, "format": response_format},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        讀取快取
+
+        Returns:
+            快取的回應文本，未命中或已過期則返回 None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return response
+
+    def set(self, key, response):
+        """寫入快取，並在超過容量時淘汰最久未使用的項目"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """清空快取"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
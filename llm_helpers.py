@@ -3,53 +3,343 @@ LLM Helper Functions
 提供 LLM API 調用和回應解析的統一介面
 """
 import os
+import re
 import json
+import threading
+import time
+from collections import deque
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # 未安裝 orjson 時改用標準庫 json
+    orjson = None
+
+try:
+    import json5
+except ImportError:  # 未安裝 json5 時略過寬鬆解析這一步
+    json5 = None
+from llm_cache import LLMCache
+from semantic_cache import SemanticCache
+
 load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL")
 API_KEY = os.getenv("API_KEY")
 MODEL = "gpt-oss:20b"
 
+# 每次請求都相同的 URL 與 headers，載入時組好
+_CHAT_URL = f"{API_BASE_URL}/api/chat"
+_HEADERS = {
+    "Authorization": f"Bearer {API_KEY}",
+    "Content-Type": "application/json",
+}
+
+# 同時進行中的 LLM 請求上限，避免並行驗證時壓垮後端
+LLM_MAX_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL", "8"))
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+# 每分鐘請求數上限（滑動視窗；0 表示不限制），避免並行驗證觸發供應商的 RPM 限制
+LLM_MAX_RPM = int(os.getenv("LLM_MAX_RPM", "0"))
+_rpm_window = deque()
+_rpm_lock = threading.Lock()
 
-def call_llm(system_prompt, user_prompt):
+
+def build_session(pool_size=32, retries=3):
     """
-    調用 LLM API 並返回回應內容
+    建立共用連線池的 Session，並對暫時性錯誤（429/5xx）自動重試
     
     Args:
-        system_prompt: 系統提示詞
-        user_prompt: 使用者提示詞
+        pool_size: 連線池大小
+        retries: 最多重試次數
     
     Returns:
-        LLM 的回應文本
+        requests.Session
     """
-    if not API_KEY:
-        raise RuntimeError("API_KEY not set")
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.3,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False,  # 重試用盡後交給 raise_for_status 處理
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# 共用的 HTTP 連線池，避免每次呼叫重新建立 TCP/TLS 連線
+_session = build_session()
+
+# 回應快取（設定 LLM_CACHE=0 可關閉）
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# 語意快取（選用，需 sentence-transformers；設定 LLM_SEMANTIC_CACHE=1 開啟）
+LLM_SEMANTIC_CACHE_ENABLED = os.getenv("LLM_SEMANTIC_CACHE", "0") == "1"
+LLM_SEMANTIC_CACHE_PATH = os.getenv("LLM_SEMANTIC_CACHE_PATH", os.path.join(".cache", "semantic_cache.pkl"))
+LLM_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+_semantic_cache = None
+
+
+def get_llm_cache():
+    """
+    取得共用的 LLM 回應快取（第一次使用時才建立）
     
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json",
-    }
+    Returns:
+        LLMCache 實例，若快取已關閉則返回 None
+    """
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(LLM_CACHE_PATH, ttl=LLM_CACHE_TTL)
+    return _cache
+
+
+def get_semantic_cache():
+    """
+    取得共用的語意快取（第一次使用時才建立）
+    
+    Returns:
+        SemanticCache 實例，若語意快取未開啟則返回 None
+    """
+    global _semantic_cache
+    if not LLM_SEMANTIC_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache(
+                LLM_SEMANTIC_CACHE_PATH,
+                threshold=LLM_SEMANTIC_CACHE_THRESHOLD,
+            )
+    return _semantic_cache
+
+
+def json_loads(text):
+    """
+    解析 JSON（有安裝 orjson 時使用 orjson，否則使用標準庫 json）
+    
+    Args:
+        text: JSON 字串或 bytes
+    
+    Returns:
+        解析後的 Python 對象
+    
+    Raises:
+        json.JSONDecodeError: 格式錯誤時（orjson 的例外也是其子類別）
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def json_dumps_bytes(obj):
+    """
+    序列化為 UTF-8 JSON bytes（有安裝 orjson 時使用 orjson）
+    
+    Args:
+        obj: 可序列化的 Python 對象
+    
+    Returns:
+        JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def json_dumps_pretty(obj):
+    """
+    序列化為縮排 2 格、保留非 ASCII 字元的 JSON 字串（供終端機輸出使用；有安裝 orjson 時使用 orjson）
+    
+    Args:
+        obj: 可序列化的 Python 對象
+    
+    Returns:
+        JSON 字串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def _wait_for_rate_limit():
+    """
+    依 LLM_MAX_RPM 做滑動視窗限流：過去 60 秒內的請求數達上限時，等到最舊的一筆離開視窗
+    """
+    if LLM_MAX_RPM <= 0:
+        return
+    while True:
+        with _rpm_lock:
+            now = time.monotonic()
+            while _rpm_window and now - _rpm_window[0] >= 60:
+                _rpm_window.popleft()
+            if len(_rpm_window) < LLM_MAX_RPM:
+                _rpm_window.append(now)
+                return
+            wait = 60 - (now - _rpm_window[0])
+        time.sleep(wait)
+
+
+def _chat_body(system_prompt, user_prompt, stream, response_format=None):
+    """
+    建立 /api/chat 請求的 body（已序列化為 bytes，直接以 data= 傳送）
+    
+    Args:
+        response_format: 傳給 Ollama 的 format 欄位（"json" 強制輸出 JSON 物件；JSON schema dict 強制符合該結構；None 不限制）
     
+    Returns:
+        JSON bytes
+    """
     payload = {
         "model": MODEL,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        "stream": False,
+        "stream": stream,
     }
+    if response_format is not None:
+        payload["format"] = response_format
+    return json_dumps_bytes(payload)
+
+
+def _semantic_partition(system_prompt, response_format):
+    """語意快取的分區文字：system prompt 加上輸出格式限制，格式不同的請求不互相命中"""
+    if response_format is None:
+        return system_prompt
+    return system_prompt + "\n\n[format] " + json.dumps(response_format, sort_keys=True, ensure_ascii=False)
+
+
+def call_llm(system_prompt, user_prompt, response_format=None):
+    """
+    調用 LLM API 並返回回應內容
+    相同的 (model, system, user, response_format) 會直接使用快取結果；
+    開啟語意快取時，system 相同且 user 語意相近的請求也會沿用先前回應
     
-    r = requests.post(
-        f"{API_BASE_URL}/api/chat",
-        headers=headers,
-        json=payload,
-        timeout=120,
-    )
+    Args:
+        system_prompt: 系統提示詞
+        user_prompt: 使用者提示詞
+        response_format: 輸出格式限制（"json" 要求只輸出 JSON 物件；傳入 JSON schema dict 時輸出必須符合該 schema）
+    
+    Returns:
+        LLM 的回應文本
+    """
+    if not API_KEY:
+        raise RuntimeError("API_KEY not set")
+    
+    cache = get_llm_cache()
+    cache_key = LLMCache.make_key(MODEL, system_prompt, user_prompt, response_format)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    semantic_cache = get_semantic_cache()
+    partition = _semantic_partition(system_prompt, response_format)
+    if semantic_cache is not None:
+        cached = semantic_cache.lookup(partition, user_prompt)
+        if cached is not None:
+            return cached
+    
+    body = _chat_body(system_prompt, user_prompt, stream=False, response_format=response_format)
+    
+    _wait_for_rate_limit()
+    with _llm_slots:
+        r = _session.post(
+            _CHAT_URL,
+            headers=_HEADERS,
+            data=body,
+            timeout=120,
+        )
     r.raise_for_status()
-    return r.json()["message"]["content"]
+    content = r.json()["message"]["content"]
+    
+    if cache is not None:
+        cache.set(cache_key, content)
+    if semantic_cache is not None:
+        semantic_cache.store(partition, user_prompt, content)
+    return content
+
+
+def call_llm_stream(system_prompt, user_prompt, response_format=None):
+    """
+    以串流模式調用 LLM API，邊生成邊產生回應片段
+    快取（精確 / 語意，與 call_llm 相同）命中時一次產生完整內容；串流完成後寫入快取
+    
+    Args:
+        system_prompt: 系統提示詞
+        user_prompt: 使用者提示詞
+        response_format: 輸出格式限制（同 call_llm）
+    
+    Yields:
+        LLM 回應文本片段
+    """
+    if not API_KEY:
+        raise RuntimeError("API_KEY not set")
+    
+    cache = get_llm_cache()
+    cache_key = LLMCache.make_key(MODEL, system_prompt, user_prompt, response_format)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+    
+    semantic_cache = get_semantic_cache()
+    partition = _semantic_partition(system_prompt, response_format)
+    if semantic_cache is not None:
+        cached = semantic_cache.lookup(partition, user_prompt)
+        if cached is not None:
+            yield cached
+            return
+    
+    body = _chat_body(system_prompt, user_prompt, stream=True, response_format=response_format)
+    
+    parts = []
+    _wait_for_rate_limit()
+    with _llm_slots:
+        with _session.post(
+            _CHAT_URL,
+            headers=_HEADERS,
+            data=body,
+            timeout=120,
+            stream=True,
+        ) as r:
+            r.raise_for_status()
+            # Ollama 串流格式：每行一個 JSON 物件（NDJSON）
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                chunk = json_loads(line)
+                content = chunk.get("message", {}).get("content", "")
+                if content:
+                    parts.append(content)
+                    yield content
+                if chunk.get("done"):
+                    break
+    
+    content = "".join(parts)
+    if cache is not None:
+        cache.set(cache_key, content)
+    if semantic_cache is not None:
+        semantic_cache.store(partition, user_prompt, content)
+
+
+# 從夾雜說明文字的回應中擷取第一個 JSON 物件或陣列
+_JSON_BLOCK_RE = re.compile(r"(\{.*\}|\[.*\])", re.DOTALL)
 
 
 def parse_json_response(llm_output):
@@ -57,6 +347,8 @@ def parse_json_response(llm_output):
     清理 LLM 回應中的 markdown 代碼塊並解析 JSON
     處理 ```json ... ``` 或 ``` ... ``` 包裹的情況
     
+    依序嘗試：直接解析 → 擷取 {...}/[...] 區塊再解析 → json5 寬鬆解析（尾逗號、單引號）
+    
     Args:
         llm_output: LLM 的原始輸出文本
     
@@ -76,4 +368,20 @@ def parse_json_response(llm_output):
     
     cleaned = cleaned.strip()
     
-    return json.loads(cleaned)
+    try:
+        return json_loads(cleaned)
+    except ValueError as e:
+        error = e
+    
+    # 回應前後夾雜說明文字時，只取 JSON 區塊
+    match = _JSON_BLOCK_RE.search(cleaned)
+    if match is None:
+        raise error
+    block = match.group(1)
+    
+    try:
+        return json_loads(block)
+    except ValueError:
+        if json5 is None:
+            raise
+    return json5.loads(block)
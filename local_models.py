@@ -0,0 +1,142 @@
+"""
+Local Models
+本地小模型（NLI cross-encoder、句向量模型）的延遲載入與推論
+需要另外安裝 sentence-transformers；未安裝時回傳 None，呼叫端應改用 LLM
+"""
+import os
+import threading
+
+STANCE_MODEL_NAME = os.getenv("STANCE_MODEL", "cross-encoder/nli-deberta-v3-small")
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+
+_stance_model = None
+_stance_model_lock = threading.Lock()
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_stance_model():
+    """
+    取得 NLI cross-encoder（第一次使用時才載入）
+
+    Returns:
+        CrossEncoder 實例，若未安裝 sentence-transformers 則返回 None
+    """
+    global _stance_model
+    with _stance_model_lock:
+        if _stance_model is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError:
+                return None
+            _stance_model = CrossEncoder(STANCE_MODEL_NAME)
+    return _stance_model
+
+
+def predict_nli_labels(pairs, batch_size=32):
+    """
+    批次預測 (premise, hypothesis) 的 NLI 標籤
+
+    Args:
+        pairs: [(text_a, text_b), ...]
+        batch_size: 推論批次大小
+
+    Returns:
+        ["entailment" | "contradiction" | "neutral", ...]，模型無法使用時返回 None
+    """
+    model = get_stance_model()
+    if model is None:
+        return None
+    if not pairs:
+        return []
+
+    scores = model.predict(pairs, batch_size=batch_size)
+    id2label = model.model.config.id2label
+    return [id2label[int(row.argmax())].lower() for row in scores]
+
+
+def get_embedder():
+    """
+    取得多語言句向量模型（第一次使用時才載入）
+
+    Returns:
+        SentenceTransformer 實例，若未安裝 sentence-transformers 則返回 None
+    """
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                return None
+            _embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _embedder
+
+
+def embed_texts(texts, batch_size=16):
+    """
+    批次編碼為正規化句向量
+
+    Args:
+        texts: 文字列表
+        batch_size: 編碼批次大小
+
+    Returns:
+        形狀 (len(texts), dim) 的向量陣列，模型無法使用時返回 None
+    """
+    model = get_embedder()
+    if model is None:
+        return None
+    return model.encode(list(texts), batch_size=batch_size, normalize_embeddings=True)
+
+
+def similarity_scores(query, texts, batch_size=16):
+    """
+    計算 query 與每段文字的 cosine 相似度（單次批次編碼）
+
+    Args:
+        query: 查詢文字
+        texts: 待比較的文字列表
+        batch_size: 編碼批次大小
+
+    Returns:
+        與 texts 順序對應的相似度列表，模型無法使用時返回 None
+    """
+    if not texts:
+        return [] if get_embedder() is not None else None
+
+    vectors = embed_texts([query] + list(texts), batch_size=batch_size)
+    if vectors is None:
+        return None
+    return (vectors[1:] @ vectors[0]).tolist()
+
+
+def top_k_similar(query, texts, k, batch_size=16):
+    """
+    找出與 query 最相近的 k 段文字（單次批次編碼 + 向量化內積，不逐筆計算）
+
+    Args:
+        query: 查詢文字
+        texts: 候選文字列表
+        k: 保留的數量
+        batch_size: 編碼批次大小
+
+    Returns:
+        依相似度由高到低排列的索引列表，模型無法使用時返回 None
+    """
+    if k <= 0 or not texts:
+        return []
+
+    vectors = embed_texts([query] + list(texts), batch_size=batch_size)
+    if vectors is None:
+        return None
+
+    import numpy as np
+
+    scores = vectors[1:] @ vectors[0]
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates])].tolist()
@@ -0,0 +1,39 @@
+"""
+Logging Setup
+統一設定 logging：請求執行緒只把紀錄放進佇列，由背景執行緒寫到 stderr，
+避免多個並行驗證同時寫 stdout 而互相等待
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_listener = None
+
+
+def configure_logging(level=None):
+    """
+    設定 root logger（重複呼叫不會重複加入 handler）
+
+    Args:
+        level: 日誌等級（None 時使用環境變數 LOG_LEVEL，預設 INFO）
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level or LOG_LEVEL)
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
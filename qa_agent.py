@@ -3,15 +3,55 @@ QA Agent - Main Agent with LLM Integration
 Integrates web search tools with LLM API for intelligent question answering.
 """
 
+import asyncio
+import hashlib
 import requests
-import json
 import os
+import re
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
 from qa_tool import web_search, format_search_results
+from local_models import top_k_similar
+from llm_helpers import build_session, json_dumps_bytes, json_loads
 
 # Load environment variables
 load_dotenv()
 
+# Keywords that suggest search is needed
+SEARCH_KEYWORDS = [
+    'search', 'find', 'look up', 'what is', 'who is', 'when', 'where',
+    'latest', 'current', 'news', 'today', '2025', '2024',
+    '搜尋', '查', '找', '是什麼', '是誰', '什麼時候', '哪裡', 
+    '最新', '現在', '新聞', '今天', '台灣', '總統', '首都'
+]
+
+# Chat keywords suggest no search needed
+CHAT_KEYWORDS = [
+    'hello', 'hi', 'hey', 'thanks', 'thank you', 'bye', 'goodbye',
+    'how are you', 'what can you do', 'tell me about yourself',
+    '你好', '謝謝', '再見', '你是誰', '你會什麼', '介紹一下'
+]
+
+
+def _keyword_pattern(keywords):
+    """Compile a keyword list into one alternation regex (single pass over the text)."""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+_SEARCH_PATTERN = _keyword_pattern(SEARCH_KEYWORDS)
+_CHAT_PATTERN = _keyword_pattern(CHAT_KEYWORDS)
+
+# In-memory cache for repeated questions within a session
+CACHE_TTL_SECONDS = 600
+CACHE_MAX_ENTRIES = 256
+
+# Optional: fetch extra results and keep the ones closest to the question by embedding
+# similarity (requires: pip install sentence-transformers)
+QA_RERANK = os.getenv("QA_RERANK", "0") == "1"
+QA_RERANK_POOL = int(os.getenv("QA_RERANK_POOL", "3"))
+
 
 class QAAgent:
     """
@@ -24,12 +64,14 @@ class QAAgent:
     4. Return LLM's answer
     """
     
-    def __init__(self, api_url=None, api_key=None):
+    def __init__(self, api_url=None, api_key=None, max_concurrency=8, max_search_concurrency=4):
         """
         Initialize the QA Agent.
         
         :param api_url: LLM API base URL (default: from .env)
         :param api_key: API key (default: from .env)
+        :param max_concurrency: Maximum LLM requests in flight at once (batch / async use)
+        :param max_search_concurrency: Maximum web searches in flight at once
         """
         self.api_url = api_url or os.getenv("API_BASE_URL", "https://api-gateway.netdb.csie.ncku.edu.tw")
         self.api_key = api_key or os.getenv("API_KEY", "")
@@ -42,9 +84,86 @@ class QAAgent:
             "Content-Type": "application/json"
         }
         
+        # Reuse pooled keep-alive connections across turns (retries transient 5xx)
+        self.session = build_session(pool_size=8, retries=2)
+        self.session.headers.update(self.headers)
+        
         self.default_model = "gpt-oss:20b"
-        self.conversation_history = []
         self.max_history = 5  # Keep last 5 exchanges
+        # Bounded to the last N exchanges (N*2 messages); older ones drop off automatically
+        self.conversation_history = deque(maxlen=self.max_history * 2)
+        
+        # Thread semaphores (the async methods run calls in worker threads), so limits
+        # hold for sync and async callers alike and across event loops
+        self._llm_slots = threading.BoundedSemaphore(max_concurrency)
+        self._search_slots = threading.BoundedSemaphore(max_search_concurrency)
+        
+        # {key: (expires_at, value)} for search results and LLM responses; the async
+        # methods touch them from worker threads, so both share one lock
+        self._search_cache = {}
+        self._response_cache = {}
+        self._cache_lock = threading.Lock()
+        
+        self._warmup_thread = None
+    
+    def _cache_get(self, cache: dict, key):
+        """
+        Read a cache entry, dropping it if it has expired.
+        
+        :return: Cached value or None
+        """
+        with self._cache_lock:
+            entry = cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                cache.pop(key, None)
+                return None
+            return entry[1]
+    
+    def _cache_put(self, cache: dict, key, value):
+        """Store a cache entry, evicting the oldest one when the cache is full."""
+        with self._cache_lock:
+            if len(cache) >= CACHE_MAX_ENTRIES:
+                cache.pop(next(iter(cache)), None)
+            cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, value)
+    
+    def _search(self, question: str, max_results: int) -> list:
+        """
+        Web search with a short-lived cache keyed by (question, max_results).
+        
+        :return: List of search result dictionaries
+        """
+        key = (question, max_results)
+        results = self._cache_get(self._search_cache, key)
+        if results is None:
+            fetch = max_results * QA_RERANK_POOL if QA_RERANK else max_results
+            with self._search_slots:
+                results = web_search(question, max_results=fetch)
+            if len(results) > max_results:
+                results = self._rerank(question, results, max_results)
+            if results:
+                self._cache_put(self._search_cache, key, results)
+        return results
+    
+    @staticmethod
+    def _rerank(question: str, results: list, top_k: int) -> list:
+        """
+        Keep the top_k results most similar to the question (one batched embedding call).
+        
+        Falls back to the search engine's order when the embedding model is unavailable.
+        
+        :return: At most top_k search result dictionaries
+        """
+        texts = [f"{r.get('title', '')} {r.get('body', '')}" for r in results]
+        try:
+            order = top_k_similar(question, texts, top_k)
+        except Exception as e:
+            print(f"⚠️ Rerank failed ({e}), using search order")
+            order = None
+        if order is None:
+            return results[:top_k]
+        return [results[i] for i in order]
     
     def _should_use_search(self, question: str) -> bool:
         """
@@ -53,32 +172,15 @@ class QAAgent:
         :param question: User's question
         :return: True if search is needed, False otherwise
         """
-        # Keywords that suggest search is needed
-        search_keywords = [
-            'search', 'find', 'look up', 'what is', 'who is', 'when', 'where',
-            'latest', 'current', 'news', 'today', '2025', '2024',
-            '搜尋', '查', '找', '是什麼', '是誰', '什麼時候', '哪裡', 
-            '最新', '現在', '新聞', '今天', '台灣', '總統', '首都'
-        ]
-        
-        # Chat keywords suggest no search needed
-        chat_keywords = [
-            'hello', 'hi', 'hey', 'thanks', 'thank you', 'bye', 'goodbye',
-            'how are you', 'what can you do', 'tell me about yourself',
-            '你好', '謝謝', '再見', '你是誰', '你會什麼', '介紹一下'
-        ]
-        
         question_lower = question.lower()
         
         # Check if it's clearly a chat message
-        for keyword in chat_keywords:
-            if keyword in question_lower:
-                return False
+        if _CHAT_PATTERN.search(question_lower):
+            return False
         
         # Check if search is explicitly or implicitly needed
-        for keyword in search_keywords:
-            if keyword in question_lower:
-                return True
+        if _SEARCH_PATTERN.search(question_lower):
+            return True
         
         # If question is very short and conversational, probably no search
         if len(question.split()) <= 3 and not any(char in question for char in ['?', '？']):
@@ -99,19 +201,14 @@ class QAAgent:
         """
         
         # Auto-detect if search is needed
-        if use_search is None:
-            use_search = self._should_use_search(question)
-            if use_search:
-                print("🔍 [Using web search]")
-            else:
-                print("💬 [Direct chat mode]")
+        use_search = self._resolve_use_search(question, use_search)
         
         # Step 1: Search web if needed
         search_results = []
         context = ""
         
         if use_search:
-            search_results = web_search(question, max_results=max_results)
+            search_results = self._search(question, max_results)
             
             if search_results:
                 context = self._build_context(search_results)
@@ -119,20 +216,92 @@ class QAAgent:
         # Step 2: Query LLM with conversation history
         llm_response = self._query_llm(question, context, show_sources)
         
+        return self._finish_answer(question, search_results, context, llm_response, show_sources)
+    
+    async def asearch_and_answer(self, question: str, use_search: bool = None, max_results: int = 3,
+                                 show_sources: bool = False, use_history: bool = True) -> dict:
+        """
+        Async version of search_and_answer (search and LLM call run in worker threads).
+        
+        :param question: User's question
+        :param use_search: Whether to search web (None = auto-detect, True/False = force)
+        :param max_results: Number of search results to use
+        :param show_sources: Whether to show source URLs (default: False)
+        :param use_history: Whether to send and update the conversation history
+        :return: Dictionary with 'question', 'search_results', 'answer'
+        """
+        use_search = self._resolve_use_search(question, use_search)
+        
+        search_results = []
+        context = ""
+        
+        if use_search:
+            search_results = await asyncio.to_thread(self._search, question, max_results)
+            
+            if search_results:
+                context = self._build_context(search_results)
+        
+        llm_response = await asyncio.to_thread(self._query_llm, question, context, show_sources, use_history)
+        
+        return self._finish_answer(question, search_results, context, llm_response, show_sources, use_history)
+    
+    async def aanswer_many(self, questions: list, use_search: bool = None, max_results: int = 3,
+                           concurrency: int = 4) -> list:
+        """
+        Answer independent questions concurrently (e.g. offline batch runs).
+        
+        Each question is answered on its own: the conversation history is neither sent nor updated.
+        
+        :param questions: List of questions
+        :param use_search: Whether to search web (None = auto-detect per question)
+        :param max_results: Number of search results to use
+        :param concurrency: Maximum number of questions in flight
+        :return: List of result dictionaries in the same order as questions
+        """
+        slots = asyncio.Semaphore(concurrency)
+        
+        async def answer(question):
+            async with slots:
+                return await self.asearch_and_answer(
+                    question, use_search=use_search, max_results=max_results, use_history=False
+                )
+        
+        return await asyncio.gather(*(answer(q) for q in questions))
+    
+    def _resolve_use_search(self, question: str, use_search: bool = None) -> bool:
+        """
+        Auto-detect whether to search when use_search is None.
+        
+        :param question: User's question
+        :param use_search: Caller's choice (None = auto-detect)
+        :return: Whether to search
+        """
+        if use_search is None:
+            use_search = self._should_use_search(question)
+            if use_search:
+                print("🔍 [Using web search]")
+            else:
+                print("💬 [Direct chat mode]")
+        return use_search
+    
+    def _finish_answer(self, question: str, search_results: list, context: str, llm_response: dict,
+                       show_sources: bool = False, use_history: bool = True) -> dict:
+        """
+        Build the result dictionary from the LLM response (and record the exchange in history).
+        
+        :return: Dictionary with 'question', 'search_results', 'answer'
+        """
         if llm_response:
             answer = llm_response.get('message', {}).get('content', 'No response')
             print(f"✅ Got answer from LLM\n")
             
             # Add to conversation history
-            self._add_to_history(question, answer)
+            if use_history:
+                self._add_to_history(question, answer)
             
             # Add sources if requested
             if show_sources and search_results:
-                answer += "\n\n📚 Sources:\n"
-                for idx, result in enumerate(search_results, 1):
-                    url = result.get('href', '')
-                    if url:
-                        answer += f"[{idx}] {url}\n"
+                answer += self._format_sources(search_results)
         else:
             answer = "❌ Failed to get response from LLM. Please try again."
         
@@ -145,9 +314,23 @@ class QAAgent:
             'success': bool(llm_response)
         }
     
+    @staticmethod
+    def _format_sources(search_results: list) -> str:
+        """
+        Format the source URL list appended to answers.
+        
+        :param search_results: List of search result dictionaries
+        :return: Sources block
+        """
+        return "\n\n📚 Sources:\n" + "".join(
+            f"[{idx}] {result['href']}\n"
+            for idx, result in enumerate(search_results, 1)
+            if result.get('href')
+        )
+    
     def _add_to_history(self, question: str, answer: str):
         """
-        Add conversation to history and maintain max length.
+        Add conversation to history (the deque keeps only the last max_history exchanges).
         
         :param question: User's question
         :param answer: Agent's answer
@@ -160,10 +343,6 @@ class QAAgent:
             'role': 'assistant',
             'content': answer
         })
-        
-        # Keep only last N exchanges (N*2 messages)
-        if len(self.conversation_history) > self.max_history * 2:
-            self.conversation_history = self.conversation_history[-(self.max_history * 2):]
     
     def _build_context(self, search_results: list) -> str:
         """
@@ -172,34 +351,32 @@ class QAAgent:
         :param search_results: List of search result dictionaries
         :return: Formatted context string
         """
-        context = "Based on the following web search results:\n\n"
+        parts = ["Based on the following web search results:\n\n"]
         
         for idx, result in enumerate(search_results, 1):
             title = result.get('title', 'No title')
             snippet = result.get('body', '')
             url = result.get('href', '')
             
-            context += f"[{idx}] {title}\n"
-            context += f"{snippet}\n"
-            context += f"Source: {url}\n\n"
+            parts.append(f"[{idx}] {title}\n{snippet}\nSource: {url}\n\n")
         
-        return context
+        return "".join(parts)
     
-    def _query_llm(self, question: str, context: str = "", show_sources: bool = False) -> dict:
+    def _build_messages(self, question: str, context: str = "", use_history: bool = True) -> list:
         """
-        Query the LLM API with question and optional context.
+        Build the chat messages: conversation history followed by the current prompt.
         
         :param question: User's question
         :param context: Additional context from web search
-        :param show_sources: Whether user wants sources
-        :return: LLM response dictionary or None
+        :param use_history: Whether to include the conversation history
+        :return: List of message dictionaries
         """
         
         # Build messages with conversation history
         messages = []
         
         # Add conversation history for context
-        if self.conversation_history:
+        if use_history and self.conversation_history:
             messages.extend(self.conversation_history)
         
         # Build current prompt
@@ -213,6 +390,35 @@ class QAAgent:
             "role": "user",
             "content": prompt
         })
+        return messages
+    
+    def _response_cache_key(self, messages: list) -> str:
+        """
+        Cache key for an LLM answer: same model and messages (history + question + search context).
+        
+        :param messages: Chat messages
+        :return: Hex digest
+        """
+        raw = json_dumps_bytes({"model": self.default_model, "messages": messages})
+        return hashlib.sha256(raw).hexdigest()
+    
+    def _query_llm(self, question: str, context: str = "", show_sources: bool = False, use_history: bool = True) -> dict:
+        """
+        Query the LLM API with question and optional context.
+        
+        :param question: User's question
+        :param context: Additional context from web search
+        :param show_sources: Whether user wants sources
+        :param use_history: Whether to include the conversation history
+        :return: LLM response dictionary or None
+        """
+        messages = self._build_messages(question, context, use_history)
+        
+        # Same messages -> reuse the earlier answer
+        cache_key = self._response_cache_key(messages)
+        cached = self._cache_get(self._response_cache, cache_key)
+        if cached is not None:
+            return cached
         
         # Prepare API request
         endpoint = f"{self.api_url}/api/chat"
@@ -223,18 +429,101 @@ class QAAgent:
         }
         
         try:
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                json=payload,
-                timeout=120
-            )
+            with self._llm_slots:
+                response = self.session.post(
+                    endpoint,
+                    data=json_dumps_bytes(payload),
+                    timeout=120
+                )
             response.raise_for_status()
-            return response.json()
+            result = json_loads(response.content)
+            self._cache_put(self._response_cache, cache_key, result)
+            return result
             
         except requests.exceptions.RequestException as e:
             print(f"❌ API Error: {e}")
             return None
+        except ValueError as e:
+            # orjson/json decode errors are ValueErrors, not RequestExceptions
+            print(f"❌ Invalid JSON from API: {e}")
+            return None
+    
+    def _stream_llm(self, messages: list):
+        """
+        Query the LLM API in streaming mode and yield the answer as it is generated.
+        
+        :param messages: Chat messages (see _build_messages)
+        :return: Generator of content chunks
+        :raises requests.exceptions.RequestException: On API errors
+        """
+        cache_key = self._response_cache_key(messages)
+        cached = self._cache_get(self._response_cache, cache_key)
+        if cached is not None:
+            yield cached.get('message', {}).get('content', '')
+            return
+        
+        endpoint = f"{self.api_url}/api/chat"
+        payload = {
+            "model": self.default_model,
+            "messages": messages,
+            "stream": True
+        }
+        
+        parts = []
+        with self._llm_slots, self.session.post(endpoint, data=json_dumps_bytes(payload), timeout=120, stream=True) as response:
+            response.raise_for_status()
+            # Ollama streams one JSON object per line
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json_loads(line)
+                content = chunk.get('message', {}).get('content', '')
+                if content:
+                    parts.append(content)
+                    yield content
+                if chunk.get('done'):
+                    break
+        
+        self._cache_put(self._response_cache, cache_key, {
+            'message': {'role': 'assistant', 'content': "".join(parts)}
+        })
+    
+    def stream_search_and_answer(self, question: str, use_search: bool = None, max_results: int = 3, show_sources: bool = False):
+        """
+        Streaming version of search_and_answer: yields the answer text as it arrives.
+        
+        :param question: User's question
+        :param use_search: Whether to search web (None = auto-detect, True/False = force)
+        :param max_results: Number of search results to use
+        :param show_sources: Whether to show source URLs (default: False)
+        :return: Generator of answer chunks (sources, if requested, come last)
+        """
+        use_search = self._resolve_use_search(question, use_search)
+        
+        search_results = []
+        context = ""
+        
+        if use_search:
+            search_results = self._search(question, max_results)
+            
+            if search_results:
+                context = self._build_context(search_results)
+        
+        parts = []
+        try:
+            for chunk in self._stream_llm(self._build_messages(question, context)):
+                parts.append(chunk)
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            print(f"❌ API Error: {e}")
+            if not parts:
+                yield "❌ Failed to get response from LLM. Please try again."
+            return
+        
+        self._add_to_history(question, "".join(parts))
+        
+        if show_sources and search_results:
+            yield self._format_sources(search_results)
     
     def chat(self, message: str, use_search: bool = False) -> str:
         """
@@ -254,9 +543,30 @@ class QAAgent:
                 return response.get('message', {}).get('content', 'No response')
             return "❌ Failed to get response"
     
+    def _warmup_connection(self):
+        """
+        Send a cheap request (model list) so the pooled HTTPS connection is open before the next question.
+        
+        Errors are ignored: the real request will report them.
+        """
+        try:
+            self.session.get(f"{self.api_url}/api/tags", timeout=10).close()
+        except requests.exceptions.RequestException:
+            pass
+    
+    def _start_warmup(self):
+        """Warm up the LLM connection in a background thread (at most one at a time)."""
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return
+        self._warmup_thread = threading.Thread(target=self._warmup_connection, daemon=True)
+        self._warmup_thread.start()
+    
     def interactive_mode(self):
         """
         Run agent in interactive mode (command-line interface).
+        
+        While waiting for input, the LLM connection is warmed up in the background
+        so the next answer does not pay the TCP/TLS handshake.
         """
         
         print("\n" + "=" * 70)
@@ -271,6 +581,7 @@ class QAAgent:
         
         while True:
             try:
+                self._start_warmup()
                 user_input = input("You: ").strip()
                 
                 if not user_input:
@@ -282,16 +593,19 @@ class QAAgent:
                 
                 # Clear history command
                 if user_input.lower() in ['clear', 'reset', 'clear history']:
-                    self.conversation_history = []
+                    self.conversation_history.clear()
                     print("\n🗑️ Conversation history cleared.\n")
                     continue
                 
                 # Check if user wants sources
                 show_sources = any(keyword in user_input.lower() for keyword in ['來源', '出處', 'source', 'reference', '參考', 'ref'])
                 
-                # Auto-detect search need and execute
-                result = self.search_and_answer(user_input, use_search=None, show_sources=show_sources)
-                print(f"Agent: {result['answer']}\n")
+                # Auto-detect search need, then print the answer as it streams in
+                use_search = self._resolve_use_search(user_input)
+                print("Agent: ", end="", flush=True)
+                for chunk in self.stream_search_and_answer(user_input, use_search=use_search, show_sources=show_sources):
+                    print(chunk, end="", flush=True)
+                print("\n")
                     
             except KeyboardInterrupt:
                 print("\n\n👋 Goodbye!")
@@ -4,9 +4,104 @@ Pure utility functions for web searching and information retrieval.
 Can be used standalone or imported by other modules.
 """
 
+import asyncio
+import atexit
+import queue
 from ddgs import DDGS
+from dotenv import load_dotenv
 from typing import Optional, List, Dict
-import json
+import os
+import threading
+import time
+
+load_dotenv()
+
+# Max searches per minute across all threads (0 = unlimited), to avoid being rate limited by the search engines
+SEARCH_MAX_RPM = int(os.getenv("SEARCH_MAX_RPM", "0"))
+
+# Pool of idle DDGS clients, reused across searches so their HTTP connections stay open.
+# A client is used by one search at a time, so the pool only grows to the peak number of
+# concurrent searches (not one client per worker thread); all clients are closed at exit.
+_idle_clients = queue.SimpleQueue()
+_all_clients = []
+_clients_lock = threading.Lock()
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket: allows short bursts, then refills at a steady rate.
+    """
+    
+    def __init__(self, rate_per_minute: int, capacity: int = 5):
+        """
+        :param rate_per_minute: Sustained number of acquisitions per minute
+        :param capacity: Maximum burst size
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, min(capacity, rate_per_minute))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_search_bucket = _TokenBucket(SEARCH_MAX_RPM) if SEARCH_MAX_RPM > 0 else None
+
+
+def _acquire_ddgs() -> DDGS:
+    """
+    Take an idle DDGS client from the pool (created if none is idle).
+    
+    :return: DDGS instance, to be handed back with _release_ddgs or _discard_ddgs
+    """
+    try:
+        return _idle_clients.get_nowait()
+    except queue.Empty:
+        ddgs = DDGS()
+        with _clients_lock:
+            _all_clients.append(ddgs)
+        return ddgs
+
+
+def _release_ddgs(ddgs: DDGS):
+    """Return a healthy client to the pool."""
+    _idle_clients.put(ddgs)
+
+
+def _discard_ddgs(ddgs: DDGS):
+    """Close a client that may be in a bad state instead of reusing it."""
+    with _clients_lock:
+        if ddgs in _all_clients:
+            _all_clients.remove(ddgs)
+    try:
+        ddgs.__exit__(None, None, None)
+    except Exception:
+        pass
+
+
+@atexit.register
+def _close_clients():
+    """Close every DDGS client created by this module."""
+    with _clients_lock:
+        clients = list(_all_clients)
+        _all_clients.clear()
+    for ddgs in clients:
+        try:
+            ddgs.__exit__(None, None, None)
+        except Exception:
+            pass
 
 
 def web_search(query: str, max_results: int = 5) -> List[Dict[str, str]]:
@@ -17,13 +112,19 @@ def web_search(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     :param max_results: Maximum number of results to return
     :return: List of search result dictionaries with 'title', 'body', and 'href'
     """
+    if _search_bucket is not None:
+        _search_bucket.acquire()
+    
+    ddgs = _acquire_ddgs()
     try:
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=max_results))
-        return results if results else []
+        results = list(ddgs.text(query, max_results=max_results))
     except Exception as e:
         print(f"❌ Search error: {e}")
+        # Start from a fresh client next time in case this one is in a bad state
+        _discard_ddgs(ddgs)
         return []
+    _release_ddgs(ddgs)
+    return results if results else []
 
 
 def format_search_results(results: List[Dict[str, str]]) -> str:
@@ -117,6 +218,26 @@ class Tools:
         
         formatted += "\n💡 This is the most recent information available."
         return formatted
+    
+    async def multi_search(
+        self,
+        queries: List[str],
+        max_results: Optional[int] = None
+    ) -> List[str]:
+        """
+        Search several queries at once (Open WebUI compatible, async).
+        
+        The searches run concurrently, so the total time is close to the slowest one.
+        
+        :param queries: List of search queries
+        :param max_results: Maximum number of results per query (default: self.max_results)
+        :return: Formatted search results, one per query in the same order
+        """
+        max_results = max_results or self.max_results
+        results = await asyncio.gather(
+            *(asyncio.to_thread(web_search, query, max_results) for query in queries)
+        )
+        return [format_search_results(r) for r in results]
 
 
 # Standalone testing
@@ -0,0 +1,166 @@
+"""
+Semantic Cache
+以句向量比對 LLM 提示詞，語意幾乎相同的請求直接沿用先前的回應
+需要另外安裝 sentence-transformers；未安裝時 lookup 一律未命中
+"""
+import atexit
+import hashlib
+import logging
+import os
+import pickle
+import threading
+
+from local_models import embed_texts
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    LLM 回應的語意快取
+
+    - 分區：system prompt 必須完全相同（依 sha256 分區），避免不同任務的提示詞互相命中
+    - 比對：分區內以 user prompt 的正規化向量做內積（= cosine 相似度）
+    - 命中：最高相似度 >= threshold 時返回對應回應
+    - get_or_compute 另有精確比對層：文字完全相同時以 sha1 直接命中，不必計算向量
+    """
+
+    def __init__(self, path, threshold=0.92, max_entries_per_partition=2000, save_every=20):
+        """
+        Args:
+            path: pickle 檔案路徑
+            threshold: 視為命中的最低 cosine 相似度
+            max_entries_per_partition: 每個分區最多保留的項目數（超過時淘汰最舊的）
+            save_every: 每寫入幾筆存檔一次（程式結束時也會存檔）
+        """
+        self.path = path
+        self.threshold = threshold
+        self.max_entries_per_partition = max_entries_per_partition
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        # {system_hash: {"vectors": ndarray (n, dim) | None, "responses": [str, ...], "exact": {sha1: value}}}
+        self._partitions = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    self._partitions = pickle.load(f)
+            except Exception as e:
+                logger.warning("Semantic cache load error: %s", e)
+                self._partitions = {}
+
+        atexit.register(self.save)
+
+    @staticmethod
+    def _partition_key(system_prompt):
+        return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+    def lookup(self, system_prompt, user_prompt):
+        """
+        查詢語意相近的快取回應
+
+        Returns:
+            快取的回應文本，未命中或無法計算向量則返回 None
+        """
+        with self._lock:
+            partition = self._partitions.get(self._partition_key(system_prompt))
+        if partition is None or partition.get("vectors") is None:
+            return None
+
+        vectors = embed_texts([user_prompt])
+        if vectors is None:
+            return None
+
+        with self._lock:
+            scores = partition["vectors"] @ vectors[0]
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                return partition["responses"][best]
+        return None
+
+    def store(self, system_prompt, user_prompt, response):
+        """寫入快取（無法計算向量時不做任何事）"""
+        vectors = embed_texts([user_prompt])
+        if vectors is None:
+            return
+
+        import numpy as np
+
+        key = self._partition_key(system_prompt)
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = {"vectors": vectors[:1], "responses": [response]}
+                self._partitions[key] = partition
+            elif partition.get("vectors") is None:
+                partition["vectors"] = vectors[:1]
+                partition["responses"] = [response]
+            else:
+                partition["vectors"] = np.vstack([partition["vectors"], vectors[:1]])
+                partition["responses"].append(response)
+
+            overflow = len(partition["responses"]) - self.max_entries_per_partition
+            if overflow > 0:
+                partition["vectors"] = partition["vectors"][overflow:]
+                partition["responses"] = partition["responses"][overflow:]
+
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+
+    def get_or_compute(self, key, text, compute):
+        """
+        先查快取（精確比對 -> 語意比對），未命中時呼叫 compute() 並寫入快取
+
+        Args:
+            key: 分區用的 key（例如 (language, temporal_check)），需可 repr
+            text: 用來比對的文字
+            compute: 未命中時呼叫的無參數函式，返回值需可 pickle
+
+        Returns:
+            快取的值或 compute() 的結果
+        """
+        partition_name = repr(key)
+        partition_key = self._partition_key(partition_name)
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            partition = self._partitions.get(partition_key)
+            if partition is not None and digest in partition.get("exact", {}):
+                return partition["exact"][digest]
+
+        cached = self.lookup(partition_name, text)
+        if cached is not None:
+            return cached
+
+        value = compute()
+        with self._lock:
+            partition = self._partitions.setdefault(partition_key, {"vectors": None, "responses": []})
+            exact = partition.setdefault("exact", {})
+            exact[digest] = value
+            if len(exact) > self.max_entries_per_partition:
+                exact.pop(next(iter(exact)))
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+        self.store(partition_name, text, value)
+        return value
+
+    def save(self):
+        """寫入磁碟（先寫暫存檔再取代，避免中斷時損毀）"""
+        with self._lock:
+            if not self._unsaved:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(self._partitions, f)
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
@@ -4,34 +4,249 @@
 防止「舊聞充新聞」的假新聞手法
 """
 
-from datetime import datetime, timedelta
-import json
-from llm_helpers import call_llm, parse_json_response
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import asyncio
+import functools
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from llm_helpers import call_llm, parse_json_response, json_dumps_pretty
+from temporal_fast import has_time_marker
 
+try:
+    from dateutil import parser as dateutil_parser
+except ImportError:  # 選用：未安裝時只使用內建格式
+    dateutil_parser = None
 
-def normalize_time_expression(time_text, reference_date=None):
+logger = logging.getLogger(__name__)
+
+
+# 常見時間詞：相對參考日期的天數（結果與 LLM 提示詞中的範例一致）
+_DAY_OFFSET_PHRASES = {
+    "今天": 0, "今日": 0, "今晨": 0, "今早": 0, "today": 0,
+    "昨天": -1, "昨日": -1, "yesterday": -1,
+    "前天": -2,
+}
+_LAST_YEAR_PHRASES = {"去年", "last year"}
+
+# 絕對日期：2025年5月1日、2025/05/01、2025.5.1
+_NUMERIC_DATE_RE = re.compile(r'(\d{4})\s*[年/.]\s*(\d{1,2})\s*[月/.]\s*(\d{1,2})\s*[日號号]?')
+# 年月：2025年5月
+_NUMERIC_MONTH_RE = re.compile(r'(\d{4})\s*年\s*(\d{1,2})\s*月(份)?')
+# 英文日期（strptime 不分大小寫）
+_DAY_FORMATS = ('%B %d, %Y', '%B %d %Y', '%b %d, %Y', '%b %d %Y', '%d %B %Y', '%d %b %Y')
+_MONTH_FORMATS = ('%B %Y', '%b %Y')
+
+# 證據送給 LLM 的範圍：開頭 + 結尾（發布日期常在文末），中段只保留日期
+EVIDENCE_HEAD_CHARS = 200
+EVIDENCE_TAIL_CHARS = 200
+# 時間單位判斷（calculate_time_range 用）
+_YEAR_RE = re.compile(r'year|年', re.IGNORECASE)
+_MONTH_RE = re.compile(r'month|月', re.IGNORECASE)
+_WEEK_RE = re.compile(r'week|週', re.IGNORECASE)
+_DATE_IN_TEXT_RE = re.compile(r'\d{4}\s*[-/.年]\s*\d{1,2}\s*[-/.月]\s*\d{1,2}(?:\s*[日號号])?')
+
+# 文中的時間表達式（TIMEX 式規則）：日期、中文相對時間、英文相對時間合併為一個 alternation，單次掃描
+_ZH_RELATIVE = re.compile(r'今天|今日|今晨|今早|凌晨|昨天|昨日|前天|去年|前年|明年|上週|本週|上個月|本月|第[一二三四]季')
+_EN_RELATIVE = re.compile(
+    r'\b(?:today|yesterday|last\s+(?:year|month|week)|this\s+(?:year|month|week)|next\s+year|q[1-4])\b',
+    re.IGNORECASE,
+)
+_TIME_EXPRESSION_RE = re.compile(
+    f"{_DATE_IN_TEXT_RE.pattern}|{_ZH_RELATIVE.pattern}|(?i:{_EN_RELATIVE.pattern})"
+)
+# 是否有任何時間線索（以詞組比對，避免「說明」、「日本」、"this"、"may" 之類的誤判；
+# 沒有命中時 claim 不可能有時間描述，不必呼叫 LLM）
+_WEEKDAYS_EN = r'monday|tuesday|wednesday|thursday|friday|saturday|sunday'
+_MONTHS_EN = (
+    r'jan(?:uary)?|feb(?:ruary)?|march|april|may|june|july|aug(?:ust)?|'
+    r'sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?'
+)
+_ANY_TEMPORAL = re.compile(
+    # 中文相對時間與日期
+    r'今天|今日|今晨|今早|今晚|今年|明天|明日|明年|昨天|昨日|昨晚|前天|後天|去年|前年'
+    r'|[上本下這这]個?(?:週|周|星期|月|季)|[週周][一二三四五六日末]|星期[一二三四五六日天]|第[一二三四1-4]季'
+    r'|[0-9一二三四五六七八九十兩几幾]+\s*(?:天|日|週|周|星期|個月|个月|年)[前後后內内]'
+    r'|最近|近日|日前|近期|稍早|剛剛|凌晨'
+    r'|\d+\s*[年月日號号]'
+    # 西元年份
+    r'|(?<!\d)(?:19|20)\d{2}(?!\d)'
+    # 英文：相對時間、星期、緊鄰日或年份的月份
+    r'|\b(?:today|yesterday|tomorrow|tonight|recently'
+    rf'|(?:this|last|next|past)\s+(?:week(?:end)?|month|year|decade|{_WEEKDAYS_EN})'
+    r'|\d+\s+(?:days?|weeks?|months?|years?)\s+ago'
+    rf'|{_WEEKDAYS_EN}'
+    rf'|(?:{_MONTHS_EN})\.?\s+\d{{1,4}}|\d{{1,2}}\s+(?:{_MONTHS_EN})'
+    r')\b',
+    re.IGNORECASE,
+)
+# 只有年份的絕對時間：2024、2024年
+_ABSOLUTE_YEAR_RE = re.compile(r'(?:19|20)\d{2}\s*年?')
+# 只修飾時刻、不改變日期的詞（「今天凌晨」仍視為單一時間描述）
+_TIME_OF_DAY_WORDS = {"凌晨"}
+# 把時間縮小到月 / 日 / 季的修飾語（「去年12月」、"last year in March"）：出現時交給 LLM 解析整句
+_DATE_QUALIFIER_RE = re.compile(
+    r'\d+\s*[月日號号]|[一二三四五六七八九十]+月|[上中下]旬|月[初底中]|年[初底中]|第[一二三四1-4]季|[上下]半年'
+    rf'|\b(?:{_MONTHS_EN})\b|\b\d+(?:st|nd|rd|th)\b|\bq[1-4]\b|\b(?:early|mid|late)[\s-]',
+    re.IGNORECASE,
+)
+
+# 結構化輸出：以 JSON schema 限制模型輸出（Ollama 的 format 欄位），欄位與列舉值和提示詞一致
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_TIME_INFO_PROPERTIES = {
+    "parsed_date": _NULLABLE_STRING,
+    "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+    "time_type": {
+        "type": "string",
+        "enum": ["specific_recent", "relative_recent", "relative_past", "no_time_reference"],
+    },
+    "explanation": {"type": "string"},
+}
+_NORMALIZE_SCHEMA = {
+    "type": "object",
+    "properties": _TIME_INFO_PROPERTIES,
+    "required": ["parsed_date", "confidence", "time_type", "explanation"],
+}
+_CLAIM_TIME_NORMALIZED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "has_time_reference": {"type": "boolean"},
+        "time_expression": _NULLABLE_STRING,
+        **_TIME_INFO_PROPERTIES,
+    },
+    "required": ["has_time_reference", "time_expression", "parsed_date", "confidence", "time_type"],
+}
+_EVIDENCE_TIME_NORMALIZED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "publish_date": _NULLABLE_STRING,
+        "time_expression": _NULLABLE_STRING,
+        **_TIME_INFO_PROPERTIES,
+    },
+    "required": ["publish_date", "time_expression", "parsed_date", "confidence", "time_type"],
+}
+_EVIDENCE_TIMES_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"idx": {"type": "integer"}, **_EVIDENCE_TIME_NORMALIZED_SCHEMA["properties"]},
+                "required": ["idx", *_EVIDENCE_TIME_NORMALIZED_SCHEMA["required"]],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
+
+@dataclass(slots=True)
+class TimeInfo:
     """
-    將任何語言的時間表達式標準化為具體日期
+    時間相關性比對用的時間資訊（parsed_date 已轉為 date，比對時不必重複解析字串）
+
+    normalize_time_expression() 等函式仍返回 dict（方便 JSON 輸出），
+    需要比對時以 TimeInfo.from_dict() 轉換一次即可
+    """
+    parsed_date: date | None
+    time_type: str = "no_time_reference"
+    confidence: str = "low"
+    original_expression: str = ""
+    granularity: str = "day"
+
+    @classmethod
+    def from_dict(cls, info):
+        """
+        由 normalize_time_expression() 結構的 dict 建立（已是 TimeInfo 時直接返回）
+
+        Args:
+            info: 時間資訊 dict 或 TimeInfo
+
+        Returns:
+            TimeInfo；parsed_date 缺少或格式錯誤時為 None
+        """
+        if isinstance(info, cls):
+            return info
+        parsed = info.get('parsed_date')
+        if isinstance(parsed, datetime):
+            parsed = parsed.date()
+        elif parsed and not isinstance(parsed, date):
+            try:
+                parsed = date.fromisoformat(str(parsed)[:10])
+            except ValueError:
+                parsed = None
+        expression = info.get('original_expression') or ''
+        return cls(
+            parsed_date=parsed or None,
+            time_type=info.get('time_type') or 'no_time_reference',
+            confidence=info.get('confidence') or 'low',
+            original_expression=expression,
+            granularity=info.get('granularity') or time_granularity(expression),
+        )
+
+    def to_dict(self):
+        """轉回 normalize_time_expression() 結構的 dict（日期為 "YYYY-MM-DD" 字串）"""
+        return {
+            "parsed_date": self.parsed_date.isoformat() if self.parsed_date else None,
+            "confidence": self.confidence,
+            "time_type": self.time_type,
+            "granularity": self.granularity,
+            "original_expression": self.original_expression,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class TemporalContext:
+    """以參考日期（「今天」）預先算好的常用日期（_parse_common_time、calculate_time_range 共用）"""
+    today: date
+    last_month_start: date
+    last_month_end: date
+    last_year_start: date
+    last_year_end: date
+
+
+def temporal_context(ref_date=None):
+    """
+    取得目前的時間脈絡（同一天內重複呼叫返回同一個物件）
     
     Args:
-        time_text: 時間表達式（中文/英文/任何語言）
-        reference_date: 參考日期（預設為今天）
+        ref_date: 參考日期 "YYYY-MM-DD"；None 時使用環境變數 FAKE_NEWS_REF_DATE，未設定則為今天
     
     Returns:
-        {
-            "parsed_date": "YYYY-MM-DD",
-            "confidence": "high" / "medium" / "low",
-            "time_type": "specific_recent" / "relative_recent" / "relative_past" / "no_time_reference",
-            "original_expression": "去年"
-        }
+        TemporalContext
     """
+    ref_date = ref_date or os.getenv("FAKE_NEWS_REF_DATE") or date.today().isoformat()
+    return _temporal_context(ref_date[:10])
+
+
+@functools.lru_cache(maxsize=8)
+def _temporal_context(ref_day):
+    today = date.fromisoformat(ref_day)
+    last_month_end = today.replace(day=1) - timedelta(days=1)
+    return TemporalContext(
+        today=today,
+        last_month_start=last_month_end.replace(day=1),
+        last_month_end=last_month_end,
+        last_year_start=date(today.year - 1, 1, 1),
+        last_year_end=date(today.year - 1, 12, 31),
+    )
+
+
+def _reference_day(reference_date):
+    """將參考日期（None / ISO 字串 / datetime）轉為 YYYY-MM-DD（None 時為 temporal_context() 的今天）"""
     if reference_date is None:
-        reference_date = datetime.now()
-    
+        return temporal_context().today.isoformat()
     if isinstance(reference_date, str):
         reference_date = datetime.fromisoformat(reference_date)
-    
-    system_prompt = """You are a time expression parser. Parse ANY time expression in any language into a standard date.
+    return reference_date.strftime('%Y-%m-%d')
+
+
+# 提示詞的固定部分（說明、範例）都放在 system prompt，每次變動的內容放在 user prompt 最後，
+# 讓支援 prefix cache 的後端可以重用相同前綴
+_NORMALIZE_SYSTEM = """You are a time expression parser. Parse ANY time expression in any language into a standard date.
 
 Handle expressions like:
 - Absolute: "2025-05-01", "May 2025"
@@ -56,158 +271,633 @@ Time type definitions:
 - specific_recent: today, yesterday, 今天, 昨天
 - relative_recent: this week, last week, recently, 最近, 上週
 - relative_past: last year, last month, 去年, 上個月
-- no_time_reference: no time information found"""
-
-    user_prompt = f"""Current reference date: {reference_date.strftime('%Y-%m-%d')}
-
-Parse this time expression: "{time_text}"
+- no_time_reference: no time information found
 
 IMPORTANT: If the text mentions a day number (like "31日" or "31st") with "yesterday/昨天", calculate which month it belongs to:
 - Reference: 2026-01-01, Text: "昨(31日)" → Result: 2025-12-31 (previous month because Jan 1st - 1 day = Dec 31st)
 - Reference: 2026-02-01, Text: "昨(31日)" → Result: 2026-01-31 (previous day in previous month)
 
-Examples:
-Input: "今天" → {{"parsed_date": "{reference_date.strftime('%Y-%m-%d')}", "confidence": "high", "time_type": "specific_recent", "explanation": "Today relative to reference date"}}
-Input: "yesterday" → {{"parsed_date": "{(reference_date - timedelta(days=1)).strftime('%Y-%m-%d')}", "confidence": "high", "time_type": "specific_recent", "explanation": "One day before reference date"}}
-Input: "去年" → {{"parsed_date": "{(reference_date.replace(year=reference_date.year-1, month=6, day=15)).strftime('%Y-%m-%d')}", "confidence": "medium", "time_type": "relative_past", "explanation": "Previous year relative to reference date"}}
-Input: "2025-05-01" → {{"parsed_date": "2025-05-01", "confidence": "high", "time_type": "relative_past", "explanation": "Specific date provided"}}
+Examples (reference date 2026-01-01):
+Input: "今天" → {"parsed_date": "2026-01-01", "confidence": "high", "time_type": "specific_recent", "explanation": "Today relative to reference date"}
+Input: "yesterday" → {"parsed_date": "2025-12-31", "confidence": "high", "time_type": "specific_recent", "explanation": "One day before reference date"}
+Input: "去年" → {"parsed_date": "2025-06-15", "confidence": "medium", "time_type": "relative_past", "explanation": "Previous year relative to reference date"}
+Input: "2025-05-01" → {"parsed_date": "2025-05-01", "confidence": "high", "time_type": "relative_past", "explanation": "Specific date provided"}
 
 Return ONLY the JSON, no other text."""
 
+def _evidence_window(text, head=EVIDENCE_HEAD_CHARS, tail=EVIDENCE_TAIL_CHARS, max_dates=5):
+    """
+    擷取證據中與時間判斷相關的部分，縮短提示詞
+    
+    Args:
+        text: 證據文本
+        head: 保留開頭的字數
+        tail: 保留結尾的字數
+        max_dates: 中段最多保留的日期數
+    
+    Returns:
+        短文本原樣返回；長文本返回「開頭 ... 中段日期 ... 結尾」
+    """
+    if len(text) <= head + tail:
+        return text
+    
+    middle_dates = list(dict.fromkeys(_DATE_IN_TEXT_RE.findall(text, head, len(text) - tail)))
+    if middle_dates:
+        middle = " ... " + ", ".join(middle_dates[:max_dates]) + " ... "
+    else:
+        middle = " ... "
+    return text[:head] + middle + text[-tail:]
+
+
+def find_time_expressions(text):
+    """
+    以規則找出文中的時間表達式（單次掃描，不呼叫 LLM）
+    
+    Args:
+        text: 任意文本
+    
+    Returns:
+        依出現順序排列、不重複的時間表達式列表
+    """
+    return list(dict.fromkeys(match.group().strip() for match in _TIME_EXPRESSION_RE.finditer(text)))
+
+
+def _local_claim_time(claim_text, reference_date):
+    """
+    claim 只含一個本地可解析的時間表達式（例如「今天」、「去年」、完整日期）時直接標準化
+    
+    Returns:
+        normalize_time_expression() 的輸出，需要 LLM 判斷時返回 None
+    """
+    expressions = [e for e in find_time_expressions(claim_text) if e not in _TIME_OF_DAY_WORDS]
+    if len(expressions) != 1:
+        return None
+    if _DATE_QUALIFIER_RE.search(claim_text.replace(expressions[0], " ")):
+        return None
+    reference = datetime.fromisoformat(_reference_day(reference_date))
+    if _parse_common_time(expressions[0].lower(), reference) is None:
+        return None
+    return normalize_time_expression(expressions[0], reference_date)
+
+
+def normalize_time_expression(time_text, reference_date=None):
+    """
+    將任何語言的時間表達式標準化為具體日期
+    
+    Args:
+        time_text: 時間表達式（中文/英文/任何語言）
+        reference_date: 參考日期（預設為今天）
+    
+    Returns:
+        {
+            "parsed_date": "YYYY-MM-DD",
+            "confidence": "high" / "medium" / "low",
+            "time_type": "specific_recent" / "relative_recent" / "relative_past" / "no_time_reference",
+            "granularity": "year" / "month" / "week" / "day",
+            "original_expression": "去年"
+        }
+    """
     try:
-        response = call_llm(system_prompt, user_prompt)
-        result = parse_json_response(response)
+        time_key = time_text.strip().lower()
+        result = dict(_normalize_cached(time_key, _reference_day(reference_date)))
         result['original_expression'] = time_text
+        result['granularity'] = time_granularity(time_text)
         return result
     except Exception as e:
-        print(f"Error normalizing time expression: {e}")
+        logger.warning("Error normalizing time expression: %s", e)
         return {
             "parsed_date": None,
             "confidence": "low",
             "time_type": "no_time_reference",
+            "granularity": time_granularity(time_text),
             "original_expression": time_text,
             "explanation": "Failed to parse"
         }
 
 
-def extract_time_from_claim(claim_text):
+def time_granularity(expression):
     """
-    從 claim 中提取時間表達式
+    判斷時間表達式的時間單位（供 calculate_time_range 選擇範圍）
     
     Args:
-        claim_text: claim 文本
+        expression: 時間表達式
+    
+    Returns:
+        "year" / "month" / "week" / "day"
+    """
+    if not expression:
+        return "day"
+    # 「2025年5月1日」、「2025年5月」含有「年」字，但單位是日 / 月
+    if _DATE_IN_TEXT_RE.search(expression):
+        return "day"
+    if _NUMERIC_MONTH_RE.search(expression):
+        return "month"
+    if _YEAR_RE.search(expression):
+        return "year"
+    if _MONTH_RE.search(expression):
+        return "month"
+    if _WEEK_RE.search(expression):
+        return "week"
+    return "day"
+
+
+def _parse_absolute_date(time_key):
+    """
+    解析絕對日期
+    
+    Args:
+        time_key: 已 strip + lower 的時間表達式
+    
+    Returns:
+        (datetime, "day" / "month")，不是絕對日期時返回 None
+    """
+    try:
+        return datetime.fromisoformat(time_key), "day"
+    except ValueError:
+        pass
+    
+    try:
+        match = _NUMERIC_DATE_RE.fullmatch(time_key)
+        if match:
+            return datetime(*map(int, match.group(1, 2, 3))), "day"
+        match = _NUMERIC_MONTH_RE.fullmatch(time_key)
+        if match:
+            return datetime(int(match.group(1)), int(match.group(2)), 1), "month"
+    except ValueError:
+        return None
+    
+    for formats, precision in ((_DAY_FORMATS, "day"), (_MONTH_FORMATS, "month")):
+        for fmt in formats:
+            try:
+                return datetime.strptime(time_key, fmt), precision
+            except ValueError:
+                continue
+    
+    # 其他格式交給 dateutil（必須含有年份，避免把「5日」之類猜成今年）
+    if dateutil_parser is not None and re.search(r'\d{4}', time_key):
+        try:
+            # 以兩個不同的預設日判斷原文是否指定了日
+            first = dateutil_parser.parse(time_key, default=datetime(2000, 1, 1))
+            second = dateutil_parser.parse(time_key, default=datetime(2000, 1, 2))
+        except (ValueError, OverflowError):
+            return None
+        if first.day == second.day:
+            return first, "day"
+        return first.replace(day=1), "month"
+    
+    return None
+
+
+def _parse_common_time(time_key, reference_date):
+    """
+    不經 LLM 直接解析絕對日期與常見時間詞
+    
+    Args:
+        time_key: 已 strip + lower 的時間表達式
+        reference_date: 參考日期（datetime）
     
     Returns:
-        時間表達式字串，如果沒有則返回 None
+        與 normalize_time_expression() 相同結構的 dict（不含 original_expression），無法解析時返回 None
     """
-    system_prompt = """You are a time expression extractor. Extract ANY time-related words or phrases from the text.
+    absolute = _parse_absolute_date(time_key)
+    if absolute is not None:
+        parsed, precision = absolute
+        if precision == "month":
+            # 只有年月：取當月中旬作為代表日期
+            return {
+                "parsed_date": parsed.replace(day=15).strftime('%Y-%m-%d'),
+                "confidence": "medium",
+                "time_type": "relative_past",
+                "explanation": "Month provided"
+            }
+        recent = abs((parsed.replace(tzinfo=None) - reference_date).days) <= 1
+        return {
+            "parsed_date": parsed.strftime('%Y-%m-%d'),
+            "confidence": "high",
+            "time_type": "specific_recent" if recent else "relative_past",
+            "explanation": "Specific date provided"
+        }
+    
+    if time_key in _DAY_OFFSET_PHRASES:
+        parsed = reference_date + timedelta(days=_DAY_OFFSET_PHRASES[time_key])
+        return {
+            "parsed_date": parsed.strftime('%Y-%m-%d'),
+            "confidence": "high",
+            "time_type": "specific_recent",
+            "explanation": "Relative day from reference date"
+        }
+    
+    if time_key in _LAST_YEAR_PHRASES:
+        # 去年：取去年年中作為代表日期
+        context = _temporal_context(reference_date.strftime('%Y-%m-%d'))
+        parsed = context.last_year_start.replace(month=6, day=15)
+        return {
+            "parsed_date": parsed.strftime('%Y-%m-%d'),
+            "confidence": "medium",
+            "time_type": "relative_past",
+            "explanation": "Previous year relative to reference date"
+        }
+    
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_cached(time_key, reference_day):
+    """
+    normalize_time_expression 的實際解析（依表達式與參考日期快取；失敗時拋出例外，不會被快取）
+    
+    Args:
+        time_key: 已 strip + lower 的時間表達式
+        reference_day: 參考日期 "YYYY-MM-DD"
+    
+    Returns:
+        解析結果 dict（共用物件，請勿修改）
+    """
+    reference_date = datetime.fromisoformat(reference_day)
+    
+    # 絕對日期與常見時間詞不需要 LLM
+    result = _parse_common_time(time_key, reference_date)
+    if result is not None:
+        return result
+    
+    user_prompt = f"""Current reference date: {reference_day}
+
+Parse this time expression: "{time_key}\""""
+
+    response = call_llm(_NORMALIZE_SYSTEM, user_prompt, response_format=_NORMALIZE_SCHEMA)
+    result = parse_json_response(response)
+    if not isinstance(result, dict):
+        raise ValueError(f"Unexpected time normalization result: {result!r}")
+    return result
+
+
+_TIME_TYPE_DEFINITIONS = """Time type definitions:
+- specific_recent: today, yesterday, 今天, 昨天
+- relative_recent: this week, last week, recently, 最近, 上週
+- relative_past: last year, last month, 去年, 上個月
+- no_time_reference: no time information found"""
+
+_CLAIM_TIME_SYSTEM = """You are a time expression extractor and parser. Find ANY time-related words or phrases in the text and parse them into a standard date relative to the reference date, in one step.
 
 Look for:
 - Absolute dates: "2025-05-01", "May 2025"
 - Relative time: "today", "yesterday", "recently", "last year"
 - Chinese time: "今天", "昨天", "去年", "上個月", "最近", "日前"
+- Day references with number: "昨(31日)", "31日" - if the day number is after the reference date's day, it belongs to the previous month/year
 
-Return JSON:
+Return JSON with this exact structure:
 {
   "has_time_reference": true or false,
   "time_expression": "the extracted time expression" or null,
-  "context": "surrounding context if helpful"
-}"""
+  "parsed_date": "YYYY-MM-DD" or null,
+  "confidence": "high" or "medium" or "low",
+  "time_type": "specific_recent" or "relative_recent" or "relative_past" or "no_time_reference",
+  "explanation": "brief explanation"
+}
+
+""" + _TIME_TYPE_DEFINITIONS + """
 
-    user_prompt = f"""Extract time expression from this text:
+Examples (reference date 2026-01-01):
+Input: "台北今天發生地震" → {"has_time_reference": true, "time_expression": "今天", "parsed_date": "2026-01-01", "confidence": "high", "time_type": "specific_recent", "explanation": "Today relative to reference date"}
+Input: "去年GDP成長5%" → {"has_time_reference": true, "time_expression": "去年", "parsed_date": "2025-06-15", "confidence": "medium", "time_type": "relative_past", "explanation": "Previous year relative to reference date"}
+Input: "Taiwan earthquake" → {"has_time_reference": false, "time_expression": null, "parsed_date": null, "confidence": "high", "time_type": "no_time_reference", "explanation": "No time reference"}
 
-"{claim_text}"
+Return ONLY the JSON."""
+
+_EVIDENCE_TIME_INSTRUCTIONS = """1. Find the publication/source date (when the article was published) and parse it to YYYY-MM-DD relative to the reference date
+2. Find the event time expression (relative time like "去年", "last year") and parse it to YYYY-MM-DD, relative to the publication date if there is one, otherwise relative to the reference date
+
+Look for:
+- Explicit dates: "Published on 2025-05-01", "2025年5月發布"
+- Metadata dates: dates near the beginning or end of text
+- Event dates: "occurred on", "happened on", "took place on"
+- Relative time: "去年", "last year", "上個月\""""
+
+_EVIDENCE_TIME_SYSTEM = """You are a publication date and event time extractor and parser. From the text, in one step:
+""" + _EVIDENCE_TIME_INSTRUCTIONS + """
+
+Return JSON with this exact structure:
+{
+  "publish_date": "YYYY-MM-DD" or null,
+  "time_expression": "the time expression from content" or null,
+  "parsed_date": "YYYY-MM-DD" or null,
+  "confidence": "high" or "medium" or "low",
+  "time_type": "specific_recent" or "relative_recent" or "relative_past" or "no_time_reference",
+  "explanation": "brief explanation"
+}
+
+""" + _TIME_TYPE_DEFINITIONS + """
 
 Examples:
-Input: "台北今天發生地震" → {{"has_time_reference": true, "time_expression": "今天", "context": "台北今天發生地震"}}
-Input: "去年GDP成長5%" → {{"has_time_reference": true, "time_expression": "去年", "context": "去年GDP成長"}}
-Input: "Taiwan earthquake" → {{"has_time_reference": false, "time_expression": null, "context": ""}}
+Input: "Published on 2025-05-01. 去年台灣GDP..." → {"publish_date": "2025-05-01", "time_expression": "去年", "parsed_date": "2024-06-15", "confidence": "medium", "time_type": "relative_past", "explanation": "Previous year relative to publication date"}
+Input: "2024年12月25日報導..." → {"publish_date": "2024-12-25", "time_expression": null, "parsed_date": null, "confidence": "high", "time_type": "no_time_reference", "explanation": "No event time in content"}
 
 Return ONLY the JSON."""
 
-    try:
-        response = call_llm(system_prompt, user_prompt)
-        result = parse_json_response(response)
-        
-        if result.get('has_time_reference') and result.get('time_expression'):
-            return result['time_expression']
+_EVIDENCE_TIMES_BATCH_SYSTEM = """You are a publication date and event time extractor and parser. You will receive several numbered texts ([1], [2], ...). For EACH text, in one step:
+""" + _EVIDENCE_TIME_INSTRUCTIONS + """
+
+Return JSON with this exact structure (one entry per text, "idx" is the text's number):
+{
+  "results": [
+    {
+      "idx": 1,
+      "publish_date": "YYYY-MM-DD" or null,
+      "time_expression": "the time expression from content" or null,
+      "parsed_date": "YYYY-MM-DD" or null,
+      "confidence": "high" or "medium" or "low",
+      "time_type": "specific_recent" or "relative_recent" or "relative_past" or "no_time_reference",
+      "explanation": "brief explanation"
+    }
+  ]
+}
+
+""" + _TIME_TYPE_DEFINITIONS + """
+
+Example:
+Input: [1] "Published on 2025-05-01. 去年台灣GDP..." [2] "2024年12月25日報導..." → {"results": [{"idx": 1, "publish_date": "2025-05-01", "time_expression": "去年", "parsed_date": "2024-06-15", "confidence": "medium", "time_type": "relative_past", "explanation": "Previous year relative to publication date"}, {"idx": 2, "publish_date": "2024-12-25", "time_expression": null, "parsed_date": null, "confidence": "high", "time_type": "no_time_reference", "explanation": "No event time in content"}]}
+
+Return ONLY the JSON."""
+
+# 批次時間提取：單次 LLM 呼叫最多處理的證據數
+EVIDENCE_TIME_BATCH_SIZE = 10
+
+
+def extract_and_normalize_from_claim(claim_text, reference_date=None):
+    """
+    以單次 LLM 呼叫提取並標準化 claim 的時間描述
+    
+    Args:
+        claim_text: claim 文本
+        reference_date: 參考日期（預設為今天）
+    
+    Returns:
+        與 normalize_time_expression() 相同結構的 dict（original_expression 為提取到的時間表達式），
+        沒有時間描述或失敗時返回 None
+    """
+    # 完全沒有時間線索：沒有時間限制
+    if not _ANY_TEMPORAL.search(claim_text):
         return None
+    
+    # 只有一個常見時間詞或完整日期時以規則解析，不需要 LLM
+    local = _local_claim_time(claim_text, reference_date)
+    if local is not None:
+        return local
+    
+    try:
+        result = _query_claim_time_normalized(claim_text, _reference_day(reference_date))
     except Exception as e:
-        print(f"Error extracting time from claim: {e}")
+        logger.warning("Error extracting time from claim: %s", e)
+        return None
+    
+    if not (result.get('has_time_reference') and result.get('time_expression')):
         return None
+    return {
+        "parsed_date": result.get('parsed_date'),
+        "confidence": result.get('confidence', 'low'),
+        "time_type": result.get('time_type', 'no_time_reference'),
+        "granularity": time_granularity(result['time_expression']),
+        "original_expression": result['time_expression'],
+        "explanation": result.get('explanation', '')
+    }
 
 
-def extract_time_from_evidence(evidence_text):
+@functools.lru_cache(maxsize=4096)
+def _query_claim_time_normalized(claim_text, reference_day):
     """
-    從證據文本中提取發布時間或事件時間
+    extract_and_normalize_from_claim 的 LLM 呼叫（依 claim 與參考日期快取；失敗時拋出例外，不會被快取）
+    
+    Returns:
+        LLM 回傳的 JSON dict（共用物件，請勿修改）
+    """
+    user_prompt = f"""Current reference date: {reference_day}
+
+Extract and parse the time expression in this text:
+
+"{claim_text}\""""
+
+    response = call_llm(_CLAIM_TIME_SYSTEM, user_prompt, response_format=_CLAIM_TIME_NORMALIZED_SCHEMA)
+    result = parse_json_response(response)
+    if not isinstance(result, dict):
+        raise ValueError(f"Unexpected time extraction result: {result!r}")
+    return result
+
+
+def extract_and_normalize_time(evidence_text, reference_date=None):
+    """
+    以單次 LLM 呼叫提取證據的發布日期與事件時間，並將事件時間標準化
     
     Args:
         evidence_text: 證據文本
+        reference_date: 證據沒有發布日期時使用的參考日期（預設為今天）
     
     Returns:
-        {
-            "time_expression": str or None - 提取的時間表達式
-            "publish_date": str or None - 證據的發布日期（如果有）
-        }
+        與 normalize_time_expression() 相同結構的 dict，另含 publish_date；
+        沒有時間表達式或失敗時返回 None
     """
-    system_prompt = """You are a publication date and event time extractor. Extract BOTH from the text:
-1. Publication/source date (when the article was published)
-2. Event time expressions (relative time like "去年", "last year")
+    reference_day = _reference_day(reference_date)
+    user_prompt = f"""Current reference date: {reference_day}
 
-Look for:
-- Explicit dates: "Published on 2025-05-01", "2025年5月發布"
-- Metadata dates: dates near the beginning or end of text
-- Event dates: "occurred on", "happened on", "took place on"
-- Relative time: "去年", "last year", "上個月"
+Extract and parse the publication date and time expression from this text:
 
-Return JSON:
-{
-  "publish_date": "YYYY-MM-DD or original date string" or null,
-  "time_expression": "the time expression from content" or null
-}"""
+"{_evidence_window(evidence_text)}\""""
 
-    user_prompt = f"""Extract publication date and time expression from this text:
+    try:
+        response = call_llm(_EVIDENCE_TIME_SYSTEM, user_prompt, response_format=_EVIDENCE_TIME_NORMALIZED_SCHEMA)
+        result = parse_json_response(response)
+    except Exception as e:
+        logger.warning("Error extracting time from evidence: %s", e)
+        return None
+    
+    return _evidence_time_info(result)
 
-"{evidence_text[:500]}..."
 
-Examples:
-Input: "Published on 2025-05-01. 去年台灣GDP..." → {{"publish_date": "2025-05-01", "time_expression": "去年"}}
-Input: "2024年12月25日報導..." → {{"publish_date": "2024-12-25", "time_expression": null}}
+def _evidence_time_info(result):
+    """
+    將 LLM 對單一證據的輸出轉為 normalize_time_expression() 結構
+    
+    Returns:
+        時間資訊 dict，沒有時間表達式時返回 None
+    """
+    if not isinstance(result, dict) or not result.get('time_expression'):
+        return None
+    return {
+        "parsed_date": result.get('parsed_date'),
+        "confidence": result.get('confidence', 'low'),
+        "time_type": result.get('time_type', 'no_time_reference'),
+        "granularity": time_granularity(result['time_expression']),
+        "original_expression": result['time_expression'],
+        "publish_date": result.get('publish_date'),
+        "explanation": result.get('explanation', '')
+    }
 
-Return ONLY the JSON."""
 
+def _extract_times_group(evidence_texts, reference_day):
+    """
+    以單次 LLM 呼叫提取並標準化一組證據的時間
+    
+    Args:
+        evidence_texts: 證據文本列表（不超過 EVIDENCE_TIME_BATCH_SIZE 個）
+        reference_day: 參考日期 "YYYY-MM-DD"
+    
+    Returns:
+        與 evidence_texts 順序對應的時間資訊（同 extract_and_normalize_time）；批次輸出缺漏的證據會個別重新提取
+    """
+    if len(evidence_texts) == 1:
+        return [extract_and_normalize_time(evidence_texts[0], reference_day)]
+    
+    blocks = "\n\n".join(
+        f'[{idx}] "{_evidence_window(text)}"' for idx, text in enumerate(evidence_texts, 1)
+    )
+    user_prompt = f"""Current reference date: {reference_day}
+
+Extract and parse the publication date and time expression from each text:
+
+{blocks}"""
+
+    by_idx = {}
     try:
-        response = call_llm(system_prompt, user_prompt)
-        result = parse_json_response(response)
-        
-        return {
-            "time_expression": result.get('time_expression'),
-            "publish_date": result.get('publish_date')
-        }
+        response = call_llm(_EVIDENCE_TIMES_BATCH_SYSTEM, user_prompt, response_format=_EVIDENCE_TIMES_BATCH_SCHEMA)
+        for item in parse_json_response(response)["results"]:
+            if isinstance(item, dict):
+                by_idx[item.get("idx")] = item
     except Exception as e:
-        print(f"Error extracting time from evidence: {e}")
-        return {
-            "time_expression": None,
-            "publish_date": None
-        }
+        logger.warning("Batched evidence time parse error: %s", e)
+    
+    return [
+        _evidence_time_info(by_idx[idx]) if idx in by_idx
+        else extract_and_normalize_time(text, reference_day)
+        for idx, text in enumerate(evidence_texts, 1)
+    ]
+
+
+async def aextract_and_normalize_times(evidence_texts, reference_date=None, batch_size=EVIDENCE_TIME_BATCH_SIZE):
+    """
+    批次提取並標準化多個證據的時間：每 batch_size 個證據合併為一次 LLM 呼叫，各批次同時進行
+    
+    Args:
+        evidence_texts: 證據文本列表
+        reference_date: 證據沒有發布日期時使用的參考日期（預設為今天）
+        batch_size: 單次 LLM 呼叫最多處理的證據數
+    
+    Returns:
+        與 evidence_texts 順序對應的時間資訊（同 extract_and_normalize_time）
+    """
+    reference_day = _reference_day(reference_date)
+    # 沒有任何年份或時間詞的證據不可能提取到時間，不送交 LLM
+    candidates = [i for i, text in enumerate(evidence_texts) if has_time_marker(text)]
+    texts = [evidence_texts[i] for i in candidates]
+    groups = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    group_results = await asyncio.gather(
+        *(asyncio.to_thread(_extract_times_group, group, reference_day) for group in groups)
+    )
+    
+    infos = [None] * len(evidence_texts)
+    for i, info in zip(candidates, (info for group in group_results for info in group)):
+        infos[i] = info
+    return infos
+
+
+async def acheck_batch(claim_time_info, evidence_texts, reference_date=None):
+    """
+    批次檢查多個證據的時間相關性
+    提取 + 標準化合併為一次 LLM 呼叫，每 EVIDENCE_TIME_BATCH_SIZE 個證據共用一次呼叫，各批次同時進行
+    
+    Args:
+        claim_time_info: extract_and_normalize_from_claim() 或 normalize_time_expression() 對 claim 的輸出
+        evidence_texts: 證據文本列表
+        reference_date: 證據沒有發布日期時使用的參考日期（預設為今天）
+    
+    Returns:
+        與 evidence_texts 順序對應的 is_temporally_relevant() 結果；無法提取時間的證據為 None
+    """
+    evidence_time_infos = await aextract_and_normalize_times(evidence_texts, reference_date)
+    claim_time_info = TimeInfo.from_dict(claim_time_info)
+    return [
+        is_temporally_relevant(claim_time_info, info) if info else None
+        for info in evidence_time_infos
+    ]
 
 
-def calculate_time_range(time_type, parsed_date, original_expression):
+def check_batch(claim_time_info, evidence_texts, reference_date=None):
     """
-    根據時間類型計算允許的時間範圍
+    acheck_batch 的同步版本（在執行中的 event loop 內呼叫時，改在另一個執行緒跑 acheck_batch）
+    
+    Args:
+        同 acheck_batch
+    
+    Returns:
+        與 evidence_texts 順序對應的 is_temporally_relevant() 結果；無法提取時間的證據為 None
+    """
+    if not evidence_texts:
+        return []
+    coroutine = acheck_batch(claim_time_info, evidence_texts, reference_date)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # asyncio.run 不能在執行中的 event loop 內呼叫
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def _absolute_granularity(expression):
+    """
+    判斷時間表達式是否為絕對時間（例如「2025年5月」、「2024」、「May 1, 2025」）
+    
+    Returns:
+        絕對時間的單位 "year" / "month" / "day"，相對時間（去年、上個月...）返回 None
+    """
+    if not expression:
+        return None
+    time_key = expression.strip().lower()
+    if _ABSOLUTE_YEAR_RE.fullmatch(time_key):
+        return "year"
+    absolute = _parse_absolute_date(time_key)
+    if absolute is None:
+        return None
+    return absolute[1]
+
+
+@functools.lru_cache(maxsize=1024)
+def calculate_time_range(time_type, parsed_date, original_expression, granularity=None):
+    """
+    根據時間類型計算允許的時間範圍（同一個 claim 對每個證據都會呼叫，結果會快取）
     
     Args:
         time_type: 時間類型
-        parsed_date: 解析後的日期字串 "YYYY-MM-DD"
-        original_expression: 原始時間表達式（用於特殊處理）
+        parsed_date: 解析後的日期（date，也接受 datetime 或 "YYYY-MM-DD" 字串）
+        original_expression: 原始時間表達式（未提供 granularity 時用來判斷時間單位）
+        granularity: 時間單位 "year" / "month" / "week" / "day"（normalize_time_expression 的輸出）
     
     Returns:
-        (start_date, end_date) datetime objects
+        (start_date, end_date) date objects
     """
     if parsed_date is None:
         return None, None
     
-    reference = datetime.fromisoformat(parsed_date)
+    if isinstance(parsed_date, datetime):
+        reference = parsed_date.date()
+    elif isinstance(parsed_date, date):
+        reference = parsed_date
+    else:
+        reference = date.fromisoformat(parsed_date)
+    if granularity is None:
+        granularity = time_granularity(original_expression)
+    
+    # 絕對時間（2025年5月、2024年）就是它本身的期間，不像「上個月」、「去年」要往前推
+    absolute = _absolute_granularity(original_expression) if time_type != "no_time_reference" else None
+    if absolute == "year":
+        return (reference.replace(month=1, day=1), reference.replace(month=12, day=31))
+    if absolute == "month":
+        start = reference.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return (start, next_month - timedelta(days=1))
+    if absolute == "day":
+        return (
+            reference - timedelta(days=1),
+            reference + timedelta(days=1)
+        )
     
     if time_type == "specific_recent":
         # 今天、昨天：容忍 ±1 天（時區問題）
@@ -218,7 +908,7 @@ def calculate_time_range(time_type, parsed_date, original_expression):
     
     elif time_type == "relative_recent":
         # 上週、最近、日前：前 7-14 天
-        if "week" in original_expression.lower() or "週" in original_expression:
+        if granularity == "week":
             # 上週：前 7-14 天
             return (
                 reference - timedelta(days=14),
@@ -233,27 +923,14 @@ def calculate_time_range(time_type, parsed_date, original_expression):
     
     elif time_type == "relative_past":
         # 去年、上個月：必須落在那個時間段內
-        if "year" in original_expression.lower() or "年" in original_expression:
+        if granularity == "year":
             # 去年：前一年的整年
-            year = reference.year - 1
-            return (
-                datetime(year, 1, 1),
-                datetime(year, 12, 31)
-            )
-        elif "month" in original_expression.lower() or "月" in original_expression:
-            # 上個月：前一個月
-            if reference.month == 1:
-                year, month = reference.year - 1, 12
-            else:
-                year, month = reference.year, reference.month - 1
-            
-            start = datetime(year, month, 1)
-            if month == 12:
-                end = datetime(year, 12, 31)
-            else:
-                end = datetime(year, month + 1, 1) - timedelta(days=1)
-            
-            return (start, end)
+            context = _temporal_context(reference.isoformat())
+            return (context.last_year_start, context.last_year_end)
+        elif granularity == "month":
+            # 上個月：前一個月（本月 1 日往前一天即上個月最後一天）
+            context = _temporal_context(reference.isoformat())
+            return (context.last_month_start, context.last_month_end)
         else:
             # 其他相對過去時間：前 60 天
             return (
@@ -274,8 +951,8 @@ def is_temporally_relevant(claim_time_info, evidence_time_info):
     檢查證據時間是否符合 claim 的時間描述
     
     Args:
-        claim_time_info: normalize_time_expression() 的輸出
-        evidence_time_info: normalize_time_expression() 的輸出
+        claim_time_info: normalize_time_expression() 的輸出（或 TimeInfo）
+        evidence_time_info: normalize_time_expression() 的輸出（或 TimeInfo）
     
     Returns:
         {
@@ -287,27 +964,27 @@ def is_temporally_relevant(claim_time_info, evidence_time_info):
             "explanation": str
         }
     """
-    # 如果沒有時間資訊或日期為空，不做限制
-    evidence_date_str = evidence_time_info.get('parsed_date')
+    claim = TimeInfo.from_dict(claim_time_info)
+    evidence = TimeInfo.from_dict(evidence_time_info)
+    evidence_date = evidence.parsed_date
     
-    if (claim_time_info.get('time_type') == 'no_time_reference' or 
-        not evidence_date_str or 
-        evidence_date_str is None or 
-        evidence_date_str == ''):
+    # 如果沒有時間資訊或日期為空，不做限制
+    if claim.time_type == 'no_time_reference' or evidence_date is None:
         return {
             "is_relevant": True,
             "status": "no_constraint",
             "expected_range": "N/A",
-            "evidence_date": evidence_date_str if evidence_date_str else 'unknown',
+            "evidence_date": evidence_date.isoformat() if evidence_date else 'unknown',
             "deviation_days": 0,
             "explanation": "No time constraint on claim or evidence"
         }
     
     # 計算 claim 的時間範圍
     time_range = calculate_time_range(
-        claim_time_info['time_type'],
-        claim_time_info['parsed_date'],
-        claim_time_info.get('original_expression', '')
+        claim.time_type,
+        claim.parsed_date,
+        claim.original_expression,
+        claim.granularity
     )
     
     if time_range[0] is None:
@@ -315,13 +992,12 @@ def is_temporally_relevant(claim_time_info, evidence_time_info):
             "is_relevant": True,
             "status": "unknown",
             "expected_range": "unknown",
-            "evidence_date": evidence_time_info['parsed_date'],
+            "evidence_date": evidence_date.isoformat(),
             "deviation_days": 0,
             "explanation": "Cannot determine time range"
         }
     
     start_date, end_date = time_range
-    evidence_date = datetime.fromisoformat(evidence_time_info['parsed_date'])
     
     # 檢查是否落在範圍內
     is_in_range = start_date <= evidence_date <= end_date
@@ -343,14 +1019,17 @@ def is_temporally_relevant(claim_time_info, evidence_time_info):
     return {
         "is_relevant": is_in_range,
         "status": status,
-        "expected_range": f"{start_date.date()} ~ {end_date.date()}",
-        "evidence_date": evidence_date.date().isoformat(),
+        "expected_range": f"{start_date} ~ {end_date}",
+        "evidence_date": evidence_date.isoformat(),
         "deviation_days": deviation,
         "explanation": explanation
     }
 
 
 if __name__ == "__main__":
+    from logging_setup import configure_logging
+    configure_logging()
+    
     # 測試
     print("=== 測試時間標準化 ===")
     
@@ -365,7 +1044,7 @@ if __name__ == "__main__":
     for time_text, ref_date in test_cases:
         print(f"\n輸入: '{time_text}' (參考日期: {ref_date})")
         result = normalize_time_expression(time_text, ref_date)
-        print(f"結果: {json.dumps(result, ensure_ascii=False, indent=2)}")
+        print(f"結果: {json_dumps_pretty(result)}")
     
     print("\n=== 測試時間相關性判斷 ===")
     
@@ -386,8 +1065,30 @@ if __name__ == "__main__":
     
     print("\n案例 1: 新聞說「去年」，證據是 2024-05-01")
     result = is_temporally_relevant(claim_info, evidence_info_valid)
-    print(f"結果: {json.dumps(result, ensure_ascii=False, indent=2)}")
+    print(f"結果: {json_dumps_pretty(result)}")
     
     print("\n案例 2: 新聞說「去年」，證據是 2023-05-01（前年）")
     result = is_temporally_relevant(claim_info, evidence_info_invalid)
-    print(f"結果: {json.dumps(result, ensure_ascii=False, indent=2)}")
+    print(f"結果: {json_dumps_pretty(result)}")
+    
+    print("\n=== 測試沒有時間線索的 claim（不應呼叫 LLM）===")
+    
+    for claim in [
+        "台北101是台灣最高的建築物",
+        "研究證明咖啡有益健康",
+        "This vaccine causes autism",
+        "Apple may release a new phone",
+        "Next-generation chips are faster",
+    ]:
+        assert not _ANY_TEMPORAL.search(claim), claim
+        assert extract_and_normalize_from_claim(claim) is None, claim
+        print(f"'{claim}' -> None")
+    
+    print("\n=== 測試需要 LLM 解析整句的 claim（不走本地快速路徑）===")
+    
+    for claim in [
+        "去年12月GDP成長3%",
+        "last year in March the bank failed",
+    ]:
+        assert _local_claim_time(claim, "2026-10-15") is None, claim
+        print(f"'{claim}' -> LLM")
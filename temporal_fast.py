@@ -0,0 +1,124 @@
+"""
+Temporal Fast Scan
+快速掃描證據文本中的年份與時間詞，判斷是否值得送交 LLM 提取時間
+安裝 numba 時以編譯後的逐位元組掃描執行；未安裝時使用結果相同的正規表示式
+"""
+import re
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:  # 選用：未安裝時使用正規表示式版本
+    np = None
+    njit = None
+
+YEAR_MIN = 1900
+YEAR_MAX = 2100
+
+# 相對時間詞與日期單位（小寫比對；寧可多送 LLM，也不要漏掉有時間的證據）
+RELATIVE_MARKERS = (
+    "今天", "今日", "今晨", "今早", "凌晨", "昨天", "昨日", "前天",
+    "去年", "前年", "明年", "上週", "本週", "上個月", "本月",
+    "天前", "年前", "週前", "日前", "近日", "最近", "月", "季",
+    "today", "yesterday", "tonight", "last ", "this week", "this month", "this year",
+    "next ", "ago", "recent",
+    "january", "february", "march", "april", "june", "july", "august",
+    "september", "october", "november", "december",
+)
+
+_YEAR_PATTERN = re.compile(r'(?<![0-9])[0-9]{4}(?![0-9])')
+_MARKER_PATTERN = re.compile("|".join(map(re.escape, RELATIVE_MARKERS)))
+
+
+if njit is not None:
+    _MARKER_BYTES = [marker.encode("utf-8") for marker in RELATIVE_MARKERS]
+    _MARKER_FLAT = np.array(list(b"".join(_MARKER_BYTES)), dtype=np.uint8)
+    _MARKER_OFFSETS = np.cumsum([0] + [len(b) for b in _MARKER_BYTES]).astype(np.int64)
+
+    @njit(cache=True)
+    def _scan_years(buf):
+        """找出長度剛好 4 的 ASCII 數字串中落在 [YEAR_MIN, YEAR_MAX] 的年份"""
+        out = np.empty(len(buf) // 4 + 1, dtype=np.int32)
+        count = 0
+        run = 0
+        value = 0
+        for i in range(len(buf) + 1):
+            c = buf[i] if i < len(buf) else 0
+            if 48 <= c <= 57:
+                run += 1
+                if run <= 4:
+                    value = value * 10 + (c - 48)
+            else:
+                if run == 4 and YEAR_MIN <= value <= YEAR_MAX:
+                    out[count] = value
+                    count += 1
+                run = 0
+                value = 0
+        return out[:count]
+
+    @njit(cache=True)
+    def _scan_markers(buf, flat, offsets):
+        """逐位元組比對攤平後的時間詞 UTF-8 序列（先比第一個位元組）"""
+        n = len(buf)
+        for i in range(n):
+            for k in range(len(offsets) - 1):
+                start = offsets[k]
+                length = offsets[k + 1] - start
+                if buf[i] != flat[start] or i + length > n:
+                    continue
+                matched = True
+                for j in range(1, length):
+                    if buf[i + j] != flat[start + j]:
+                        matched = False
+                        break
+                if matched:
+                    return True
+        return False
+
+
+def _to_buffer(text):
+    return np.frombuffer(bytearray(text.lower().encode("utf-8")), dtype=np.uint8)
+
+
+def extract_years(text):
+    """
+    找出文中的西元年份
+
+    Args:
+        text: 任意文本
+
+    Returns:
+        依出現順序排列的年份列表（int）
+    """
+    if njit is not None:
+        return _scan_years(_to_buffer(text)).tolist()
+    years = map(int, _YEAR_PATTERN.findall(text))
+    return [year for year in years if YEAR_MIN <= year <= YEAR_MAX]
+
+
+def has_relative_marker(text):
+    """
+    判斷文中是否有相對時間詞或日期單位
+
+    Args:
+        text: 任意文本
+
+    Returns:
+        True / False
+    """
+    if njit is not None:
+        return bool(_scan_markers(_to_buffer(text), _MARKER_FLAT, _MARKER_OFFSETS))
+    return _MARKER_PATTERN.search(text.lower()) is not None
+
+
+def has_time_marker(text):
+    """
+    判斷文中是否可能有時間資訊（年份或時間詞）；沒有時不需要交給 LLM 提取時間
+
+    Args:
+        text: 任意文本
+
+    Returns:
+        True / False
+    """
+    return has_relative_marker(text) or bool(extract_years(text))
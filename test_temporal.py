@@ -1,60 +1,133 @@
 """
 測試時間相關性檢查功能
+用法：python test_temporal.py（互動選單）或 python test_temporal.py --all-parallel（不詢問，同時執行所有案例）
+驗證結果會快取在 .tmp_test_cache.pkl（重跑時直接重播；刪除檔案或設定 TEST_CACHE=0 即重新呼叫 API）
 """
 from fake_news_agent import FakeNewsAgent
-import json
+from llm_helpers import json_dumps_pretty
+from logging_setup import configure_logging
+from semantic_cache import SemanticCache
+from temporal_checker import temporal_context
+import asyncio
+import os
+import sys
 
+TEST_CACHE = os.getenv("TEST_CACHE", "1") == "1"
+TEST_CACHE_PATH = ".tmp_test_cache.pkl"
 
-def test_case_1():
+_AGENT = None
+
+
+def _agent():
+    """所有測試案例共用同一個 FakeNewsAgent（Agent 本身不保存每次呼叫的狀態）"""
+    global _AGENT
+    if _AGENT is None:
+        _AGENT = FakeNewsAgent()
+    return _AGENT
+
+
+_CACHE = None
+
+
+def _cache():
+    """測試結果快取（TEST_CACHE=0 時返回 None）"""
+    global _CACHE
+    if TEST_CACHE and _CACHE is None:
+        _CACHE = SemanticCache(TEST_CACHE_PATH, threshold=0.9, save_every=1)
+    return _CACHE
+
+
+def _run(news, language="zh-TW", temporal_check=True):
     """
-    測試案例 1: 新聞說「今天」但找到的證據都是舊的
-    預期：應該偵測到時間不符
+    執行 agent.run，相同或語意相近的新聞直接返回快取的驗證結果
+    （sentence-transformers 未安裝時只有完全相同的新聞會命中）
     """
-    print("=" * 80)
-    print("測試案例 1: 新聞聲稱「今天發生」，但證據都是舊的")
-    print("=" * 80)
-    
-    # 模擬一則假新聞：說今天發生，但實際是舊聞
-    news = """
+    agent = _agent()
+    compute = lambda: agent.run(news, language=language, temporal_check=temporal_check)
+    cache = _cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute((language, temporal_check), news, compute)
+
+
+# (標題, 新聞內容, temporal_check)
+CASES = [
+    (
+        "測試案例 1: 新聞聲稱「今天發生」，但證據都是舊的",
+        # 模擬一則假新聞：說今天發生，但實際是舊聞
+        """
 Title: 台北今天凌晨發生規模6.0地震
 Content: 
 根據報導，台北市今天凌晨3點發生規模6.0地震，震央位於信義區。
 地震造成多棟建築物受損，目前已知有50人受傷。
 中央氣象署表示這是近年來台北地區最大的地震。
 消防局動員超過200名消防員進行救援工作。
-"""
-    
-    agent = FakeNewsAgent()
-    result = agent.run(news, language="zh-TW", temporal_check=True)
-    
+""",
+        True,
+    ),
+    (
+        "測試案例 2: 新聞提到「去年」的事件",
+        """
+Title: 去年台灣GDP成長率創新高
+Content:
+根據統計，去年台灣GDP成長率達到5.8%，創下近年新高。
+主計處表示，去年經濟表現優於預期，主要受惠於出口暢旺。
+去年第四季成長率達到6.2%，帶動全年表現。
+""",
+        True,
+    ),
+    (
+        "測試案例 3: 沒有特定時間描述的新聞",
+        """
+Title: 台北101是台灣最高的建築物
+Content:
+台北101大樓高度達到509公尺，是台灣最高的摩天大樓。
+大樓共有101層，曾經是世界最高建築。
+每年跨年煙火秀都在這裡舉行，吸引大量遊客。
+""",
+        True,
+    ),
+    (
+        "測試案例 4: 關閉時間檢查功能（temporal_check=False）",
+        """
+Title: 台北今天凌晨發生地震
+Content:
+根據報導，台北市今天凌晨發生地震。
+""",
+        False,
+    ),
+]
+
+
+def _print_case(title, result):
+    """印出單一測試案例的標題與驗證結果"""
+    print("=" * 80)
+    print(title)
+    print("=" * 80)
     print("\n=== 驗證結果 ===")
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    print(json_dumps_pretty(result))
     print("\n")
 
 
+def _run_case(index):
+    title, news, temporal_check = CASES[index]
+    _print_case(title, _run(news, language="zh-TW", temporal_check=temporal_check))
+
+
+def test_case_1():
+    """
+    測試案例 1: 新聞說「今天」但找到的證據都是舊的
+    預期：應該偵測到時間不符
+    """
+    _run_case(0)
+
+
 def test_case_2():
     """
     測試案例 2: 新聞說「去年」
     預期：只接受 2024 年的證據，2023 年的應該被過濾
     """
-    print("=" * 80)
-    print("測試案例 2: 新聞提到「去年」的事件")
-    print("=" * 80)
-    
-    news = """
-Title: 去年台灣GDP成長率創新高
-Content:
-根據統計，去年台灣GDP成長率達到5.8%，創下近年新高。
-主計處表示，去年經濟表現優於預期，主要受惠於出口暢旺。
-去年第四季成長率達到6.2%，帶動全年表現。
-"""
-    
-    agent = FakeNewsAgent()
-    result = agent.run(news, language="zh-TW", temporal_check=True)
-    
-    print("\n=== 驗證結果 ===")
-    print(json.dumps(result, ensure_ascii=False, indent=2))
-    print("\n")
+    _run_case(1)
 
 
 def test_case_3():
@@ -62,24 +135,7 @@ def test_case_3():
     測試案例 3: 無時間描述的新聞
     預期：不做時間限制
     """
-    print("=" * 80)
-    print("測試案例 3: 沒有特定時間描述的新聞")
-    print("=" * 80)
-    
-    news = """
-Title: 台北101是台灣最高的建築物
-Content:
-台北101大樓高度達到509公尺，是台灣最高的摩天大樓。
-大樓共有101層，曾經是世界最高建築。
-每年跨年煙火秀都在這裡舉行，吸引大量遊客。
-"""
-    
-    agent = FakeNewsAgent()
-    result = agent.run(news, language="zh-TW", temporal_check=True)
-    
-    print("\n=== 驗證結果 ===")
-    print(json.dumps(result, ensure_ascii=False, indent=2))
-    print("\n")
+    _run_case(2)
 
 
 def test_case_4():
@@ -87,39 +143,45 @@ def test_case_4():
     測試案例 4: 關閉時間檢查
     預期：即使有時間描述也不做限制
     """
-    print("=" * 80)
-    print("測試案例 4: 關閉時間檢查功能（temporal_check=False）")
-    print("=" * 80)
-    
-    news = """
-Title: 台北今天凌晨發生地震
-Content:
-根據報導，台北市今天凌晨發生地震。
-"""
-    
-    agent = FakeNewsAgent()
-    result = agent.run(news, language="zh-TW", temporal_check=False)
-    
-    print("\n=== 驗證結果 ===")
-    print(json.dumps(result, ensure_ascii=False, indent=2))
-    print("\n")
+    _run_case(3)
+
+
+async def run_case_async(news, temporal_check):
+    """在背景 thread 執行單一案例（agent.run 為同步 I/O）"""
+    return await asyncio.to_thread(_run, news, language="zh-TW", temporal_check=temporal_check)
+
+
+async def run_all_cases():
+    """
+    同時執行所有測試案例（等待 LLM / 搜尋的時間互相重疊），完成後依序印出結果
+    """
+    # 共用的 agent 與快取先在主 thread 建立，避免各 thread 同時初始化
+    _agent()
+    _cache()
+    results = await asyncio.gather(*(run_case_async(news, temporal_check) for _, news, temporal_check in CASES))
+    for (title, _, _), result in zip(CASES, results):
+        _print_case(title, result)
 
 
 if __name__ == "__main__":
+    configure_logging()
     print("\n" + "=" * 80)
     print("開始測試時間相關性檢查功能")
-    print("當前日期: 2026-01-01")
+    print(f"當前日期: {temporal_context().today}（可用 FAKE_NEWS_REF_DATE 固定）")
     print("=" * 80 + "\n")
     
-    # 選擇要執行的測試
-    print("請選擇測試案例:")
-    print("1. 測試「今天」的時間檢查（假新聞用舊聞）")
-    print("2. 測試「去年」的時間範圍")
-    print("3. 測試無時間限制的新聞")
-    print("4. 測試關閉時間檢查")
-    print("5. 執行所有測試（警告：會呼叫很多次 API）")
-    
-    choice = input("\n輸入選項 (1-5): ").strip()
+    if "--all-parallel" in sys.argv:
+        choice = "5"
+    else:
+        # 選擇要執行的測試
+        print("請選擇測試案例:")
+        print("1. 測試「今天」的時間檢查（假新聞用舊聞）")
+        print("2. 測試「去年」的時間範圍")
+        print("3. 測試無時間限制的新聞")
+        print("4. 測試關閉時間檢查")
+        print("5. 執行所有測試（同時執行；警告：會呼叫很多次 API）")
+        
+        choice = input("\n輸入選項 (1-5): ").strip()
     
     if choice == "1":
         test_case_1()
@@ -131,13 +193,7 @@ if __name__ == "__main__":
         test_case_4()
     elif choice == "5":
         print("\n執行所有測試...\n")
-        test_case_1()
-        input("按 Enter 繼續下一個測試...")
-        test_case_2()
-        input("按 Enter 繼續下一個測試...")
-        test_case_3()
-        input("按 Enter 繼續下一個測試...")
-        test_case_4()
+        asyncio.run(run_all_cases())
     else:
         print("無效的選項，執行測試案例 1")
         test_case_1()